@@ -3,28 +3,61 @@
 Показывает основные возможности системы
 """
 
+import contextlib
+import io
+import os
+import sys
 from semantic_network import create_medical_knowledge_base
-from inference_engine import InferenceEngine
+from inference_engine import InferenceEngine, INFO_ATTRIBUTES
 from explanation import ExplanationComponent
 
 
+# Разделители блоков вывода
+SEP = "=" * 60
+SEP_DASH = "-" * 60
+NL_SEP = "\n" + SEP
+NL_SEP_DASH = "\n" + SEP_DASH
+
+
+# Данные сложного сценария (строки интернированы один раз при загрузке модуля)
+COMPLEX_SCENARIO_SYMPTOMS = tuple(sys.intern(s) for s in (
+    "Высокая_температура", "Кашель", "Боль_в_груди", "Одышка", "Слабость"))
+RESPIRATORY = sys.intern("Респираторное_заболевание")
+INFECTIOUS = sys.intern("Инфекционное_заболевание")
+
+# Общий контекст демонстраций (база знаний не меняется между ними)
+_KB = None
+_ENGINE = None
+_EXPLAINER = None
+
+
+def _get_context():
+    """Получить базу знаний, механизм вывода и компонент объяснения"""
+    global _KB, _ENGINE, _EXPLAINER
+    
+    if _KB is None:
+        _KB = create_medical_knowledge_base()
+        _ENGINE = InferenceEngine(_KB)
+        _EXPLAINER = ExplanationComponent(_ENGINE)
+    
+    return _KB, _ENGINE, _EXPLAINER
+
+
 def print_separator(title=""):
     """Печать разделителя"""
     if title:
-        print("\n" + "=" * 60)
+        print(NL_SEP)
         print(f"  {title}")
-        print("=" * 60)
+        print(SEP)
     else:
-        print("\n" + "-" * 60)
+        print(NL_SEP_DASH)
 
 
 def demo_query_type_1():
     """Демонстрация запроса типа 1: Является ли X подтипом Y?"""
     print_separator("ЗАПРОС ТИПА 1: Является ли X подтипом Y?")
     
-    kb = create_medical_knowledge_base()
-    engine = InferenceEngine(kb)
-    explainer = ExplanationComponent(engine)
+    kb, engine, explainer = _get_context()
     
     # Пример 1
     print("\nПример 1: Является ли Грипп подтипом Инфекционного_заболевания?")
@@ -40,15 +73,14 @@ def demo_query_type_1():
     print("\nПример 3: Является ли ОРВИ подтипом Заболевания?")
     result = engine.is_subtype_of("ОРВИ", "Заболевание")
     print(f"Результат: {'ДА' if result else 'НЕТ'}")
-    print(explainer.explain_subtype_check("ОРВИ", "Заболевание", result))
+    explainer.write_subtype_check("ОРВИ", "Заболевание", result)
 
 
 def demo_query_type_2():
     """Демонстрация запроса типа 2: Какие симптомы имеет заболевание X?"""
     print_separator("ЗАПРОС ТИПА 2: Какие симптомы имеет заболевание X?")
     
-    kb = create_medical_knowledge_base()
-    engine = InferenceEngine(kb)
+    kb, engine, explainer = _get_context()
     
     diseases = ["Грипп", "Пневмония", "Гастрит"]
     
@@ -63,33 +95,30 @@ def demo_query_type_3():
     """Демонстрация запроса типа 3: Диагностика по симптомам"""
     print_separator("ЗАПРОС ТИПА 3: Диагностика по симптомам")
     
-    kb = create_medical_knowledge_base()
-    engine = InferenceEngine(kb)
-    explainer = ExplanationComponent(engine)
+    kb, engine, explainer = _get_context()
     
     # Пример 1: Симптомы гриппа
     print("\nПример 1: Пациент с высокой температурой, кашлем и головной болью")
     symptoms = ["Высокая_температура", "Кашель", "Головная_боль"]
-    diagnosis = engine.diagnose_by_symptoms(symptoms)
+    diagnosis = engine.diagnose_by_symptoms(symptoms, top_k=3)
     
     print("\nРезультаты диагностики:")
-    for disease, confidence, matched in diagnosis[:3]:  # Топ-3
-        print(f"  {disease}: {confidence:.1%}")
+    for result in diagnosis:  # Топ-3
+        print(f"  {result.disease}: {result.confidence_str}")
     
     # Пример 2: Симптомы отравления
     print("\n\nПример 2: Пациент с тошнотой, рвотой и диареей")
     symptoms = ["Тошнота", "Рвота", "Диарея"]
     diagnosis = engine.diagnose_by_symptoms(symptoms)
     
-    print(explainer.explain_diagnosis(symptoms, diagnosis))
+    explainer.write_diagnosis(symptoms, diagnosis)
 
 
 def demo_query_type_4():
     """Демонстрация запроса типа 4: Как лечить заболевание X?"""
     print_separator("ЗАПРОС ТИПА 4: Как лечить заболевание X?")
     
-    kb = create_medical_knowledge_base()
-    engine = InferenceEngine(kb)
+    kb, engine, explainer = _get_context()
     
     diseases = ["Грипп", "Пневмония", "Пищевое_отравление"]
     
@@ -107,8 +136,7 @@ def demo_query_type_5():
     """Демонстрация запроса типа 5: Заболевания по категории"""
     print_separator("ЗАПРОС ТИПА 5: Заболевания по категории")
     
-    kb = create_medical_knowledge_base()
-    engine = InferenceEngine(kb)
+    kb, engine, explainer = _get_context()
     
     categories = ["Респираторное_заболевание", "Желудочно-кишечное_заболевание"]
     
@@ -123,100 +151,137 @@ def demo_explanation_component():
     """Демонстрация компонента объяснения"""
     print_separator("КОМПОНЕНТ ОБЪЯСНЕНИЯ")
     
-    kb = create_medical_knowledge_base()
-    engine = InferenceEngine(kb)
-    explainer = ExplanationComponent(engine)
+    kb, engine, explainer = _get_context()
     
     print("\nСводка по базе знаний:")
-    print(explainer.generate_summary(kb))
+    explainer.write_summary(kb)
     
     print("\nПолучение информации о концепте 'Грипп':")
     info = engine.get_all_related_info("Грипп")
-    print(explainer.explain_concept_info("Грипп", info))
+    explainer.write_concept_info("Грипп", info)
 
 
 def demo_complex_scenario():
     """Демонстрация сложного сценария использования"""
     print_separator("СЛОЖНЫЙ СЦЕНАРИЙ: Полная диагностика пациента")
     
-    kb = create_medical_knowledge_base()
-    engine = InferenceEngine(kb)
-    explainer = ExplanationComponent(engine)
+    kb, engine, explainer = _get_context()
     
     print("\nСценарий: Пациент обратился с жалобами")
     print("Симптомы: Высокая температура, Кашель, Боль в груди, Одышка, Слабость")
     
-    symptoms = ["Высокая_температура", "Кашель", "Боль_в_груди", "Одышка", "Слабость"]
+    symptoms = list(COMPLEX_SCENARIO_SYMPTOMS)
     
     # Шаг 1: Диагностика
     print("\n--- ШАГ 1: Диагностика ---")
     diagnosis = engine.diagnose_by_symptoms(symptoms)
     
     if diagnosis:
-        top_disease, confidence, matched = diagnosis[0]
-        print(f"\nНаиболее вероятный диагноз: {top_disease} ({confidence:.1%})")
+        top_disease = diagnosis[0].disease
+        print(f"\nНаиболее вероятный диагноз: {top_disease} ({diagnosis[0].confidence_str})")
+        
+        # Вся информация о заболевании собирается за один запрос
+        description = engine.describe(top_disease, [RESPIRATORY, INFECTIOUS])
         
         # Шаг 2: Проверка типа заболевания
         print("\n--- ШАГ 2: Классификация заболевания ---")
-        is_respiratory = engine.is_subtype_of(top_disease, "Респираторное_заболевание")
-        is_infectious = engine.is_subtype_of(top_disease, "Инфекционное_заболевание")
+        is_respiratory = description.subtype_checks[RESPIRATORY]
+        is_infectious = description.subtype_checks[INFECTIOUS]
         
         print(f"Респираторное заболевание: {'Да' if is_respiratory else 'Нет'}")
         print(f"Инфекционное заболевание: {'Да' if is_infectious else 'Нет'}")
         
         # Шаг 3: Получение полной информации
         print("\n--- ШАГ 3: Полная информация о заболевании ---")
-        info = engine.get_all_related_info(top_disease)
+        info = description.info
         
-        print(f"\nТип: {info['атрибуты'].get('type')}")
-        print(f"Тяжесть: {info['атрибуты'].get('severity')}")
-        print(f"Заразное: {info['атрибуты'].get('contagious')}")
+        attributes = info[INFO_ATTRIBUTES]
+        print(f"\nТип: {attributes.get('type')}")
+        print(f"Тяжесть: {attributes.get('severity')}")
+        print(f"Заразное: {attributes.get('contagious')}")
         
         # Шаг 4: Рекомендации по лечению
         print("\n--- ШАГ 4: Рекомендации по лечению ---")
-        treatments = engine.get_treatment(top_disease)
         print("\nРекомендуемое лечение:")
-        for treatment in treatments:
+        for treatment in description.treatments:
             print(f"  • {treatment}")
         
         # Шаг 5: Объяснение
         print("\n--- ШАГ 5: Подробное объяснение ---")
-        print(explainer.explain_diagnosis(symptoms, diagnosis))
+        explainer.write_diagnosis(symptoms, diagnosis)
+
+
+def pause_enabled() -> bool:
+    """
+    Определить, нужны ли паузы между демонстрациями
+    
+    Паузы отключаются флагом --no-pause или переменной окружения DEMO_PAUSE=0
+    (например, для автоматического запуска и профилирования).
+    """
+    if "--no-pause" in sys.argv[1:]:
+        return False
+    return os.environ.get("DEMO_PAUSE", "1") == "1"
+
+
+def wait_for_user(enabled=True):
+    """Ожидание нажатия Enter (пропускается, если паузы отключены)"""
+    if enabled:
+        input("\nНажмите Enter для продолжения...")
+
+
+def run_buffered(demo_function):
+    """
+    Выполнить демонстрацию, накапливая ее вывод в буфере
+    
+    Весь вывод демонстрации записывается в sys.stdout одним вызовом write
+    вместо множества отдельных print. Накопленный вывод записывается и
+    тогда, когда демонстрация завершилась исключением (в том числе
+    KeyboardInterrupt), чтобы было видно, на чем она остановилась.
+    """
+    buffer = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buffer):
+            demo_function()
+    finally:
+        sys.stdout.write(buffer.getvalue())
+        sys.stdout.flush()
 
 
 def main():
     """Запуск всех демонстраций"""
-    print("=" * 60)
+    pause = pause_enabled()
+    
+    print(SEP)
     print("  ДЕМОНСТРАЦИЯ ЭКСПЕРТНОЙ СИСТЕМЫ")
     print("  Лабораторная работа №3")
     print("  Семантические сети")
-    print("=" * 60)
+    print(SEP)
     
     try:
         # Демонстрация всех типов запросов
-        demo_query_type_1()
-        input("\nНажмите Enter для продолжения...")
+        run_buffered(demo_query_type_1)
+        wait_for_user(pause)
         
-        demo_query_type_2()
-        input("\nНажмите Enter для продолжения...")
+        run_buffered(demo_query_type_2)
+        wait_for_user(pause)
         
-        demo_query_type_3()
-        input("\nНажмите Enter для продолжения...")
+        run_buffered(demo_query_type_3)
+        wait_for_user(pause)
         
-        demo_query_type_4()
-        input("\nНажмите Enter для продолжения...")
+        run_buffered(demo_query_type_4)
+        wait_for_user(pause)
         
-        demo_query_type_5()
-        input("\nНажмите Enter для продолжения...")
+        run_buffered(demo_query_type_5)
+        wait_for_user(pause)
         
-        demo_explanation_component()
-        input("\nНажмите Enter для продолжения...")
+        run_buffered(demo_explanation_component)
+        wait_for_user(pause)
         
-        demo_complex_scenario()
+        run_buffered(demo_complex_scenario)
         
-        print("\n" + "=" * 60)
+        print(NL_SEP)
         print("  ДЕМОНСТРАЦИЯ ЗАВЕРШЕНА")
-        print("=" * 60)
+        print(SEP)
         
     except KeyboardInterrupt:
         print("\n\nДемонстрация прервана пользователем.")
@@ -3,8 +3,53 @@
 Предоставляет объяснения логического вывода в понятной форме
 """
 
-from typing import List, Dict, Any
-from inference_engine import InferenceEngine
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, TextIO
+from inference_engine import (InferenceEngine, INFO_ATTRIBUTES,
+                              INFO_OUTGOING, INFO_INCOMING, format_confidence)
+from semantic_network import REL_HAS_SYMPTOM, REL_TREATED_BY
+
+
+# Разделители блоков объяснения
+SEP = "=" * 60
+NL_SEP = "\n" + SEP
+
+
+def _format_str(details: str) -> Iterator[str]:
+    """Строка шага трассировки"""
+    yield f"  {details}"
+
+
+def _format_list(details: list) -> Iterator[str]:
+    """Список: по элементу на строку"""
+    for item in details:
+        yield f"  - {item}"
+
+
+def _format_dict(details: dict) -> Iterator[str]:
+    """Словарь: пары ключ-значение"""
+    for key, value in details.items():
+        yield f"  {key}: {value}"
+
+
+def _format_other(details: Any) -> Iterator[str]:
+    """Прочие значения выводятся как есть"""
+    yield f"  {details}"
+
+
+# Форматирование деталей шага трассировки по типу значения
+_DETAIL_FORMATTERS = {
+    str: _format_str,
+    list: _format_list,
+    tuple: _format_list,
+    dict: _format_dict,
+}
+
+
+def _write_lines(lines: Iterable[str], file: Optional[TextIO] = None):
+    """Вывести строки объяснения по одной, не собирая общий текст"""
+    for line in lines:
+        print(line, file=file)
 
 
 class ExplanationComponent:
@@ -22,6 +67,40 @@ class ExplanationComponent:
         """
         self.engine = inference_engine
         
+    def _check_subtype(self, concept1: str, concept2: str) -> Tuple[bool, List[str]]:
+        """
+        Проверить подтип, не изменяя трассировку механизма вывода
+        
+        explain_last_inference по-прежнему объясняет последний запрос
+        к механизму вывода. Проверка - битовый тест по замыканию подтипов,
+        поэтому результат не кэшируется.
+        
+        Args:
+            concept1: Проверяемый концепт
+            concept2: Родительский концепт
+            
+        Returns:
+            Кортеж (результат, просмотренные связи)
+        """
+        result = self.engine.check_subtype(concept1, concept2)
+        
+        # Те же связи, что в шагах "Найдена связь" трассировки is_subtype_of
+        links = self.engine.get_subtype_links(concept1, concept2) if result else []
+        return result, links
+    
+    def _get_symptoms(self, disease: str) -> Tuple[str, ...]:
+        """
+        Получить симптомы заболевания из индекса смежности
+        
+        В отличие от engine.get_symptoms, не трассируется и не сбрасывает
+        трассировку последнего вывода.
+        """
+        return self.engine.kb.get_targets(disease, REL_HAS_SYMPTOM)
+    
+    def _get_treatments(self, disease: str) -> Tuple[str, ...]:
+        """Получить методы лечения заболевания из индекса смежности (без трассировки)"""
+        return self.engine.kb.get_targets(disease, REL_TREATED_BY)
+    
     def explain_last_inference(self) -> str:
         """
         Объяснить последний логический вывод
@@ -34,243 +113,287 @@ class ExplanationComponent:
         if not trace:
             return "Нет данных о последнем выводе."
         
-        explanation = []
-        explanation.append("=" * 60)
-        explanation.append("ОБЪЯСНЕНИЕ ЛОГИЧЕСКОГО ВЫВОДА")
-        explanation.append("=" * 60)
-        
-        for i, step in enumerate(trace, 1):
-            explanation.append(f"\nШаг {i}: {step['step']}")
+        def _lines():
+            yield SEP
+            yield "ОБЪЯСНЕНИЕ ЛОГИЧЕСКОГО ВЫВОДА"
+            yield SEP
             
-            details = step['details']
-            if isinstance(details, str):
-                explanation.append(f"  {details}")
-            elif isinstance(details, list):
-                for item in details:
-                    explanation.append(f"  - {item}")
-            elif isinstance(details, dict):
-                for key, value in details.items():
-                    explanation.append(f"  {key}: {value}")
-            else:
-                explanation.append(f"  {details}")
-        
-        explanation.append("\n" + "=" * 60)
-        
-        return "\n".join(explanation)
-    
-    def explain_diagnosis(self, symptoms: List[str], 
-                         diagnosis_results: List[tuple]) -> str:
-        """
-        Объяснить результаты диагностики
-        
-        Args:
-            symptoms: Список симптомов
-            diagnosis_results: Результаты диагностики
+            for i, step in enumerate(trace, 1):
+                yield f"\nШаг {i}: {step.step}"
+                
+                details = step.details
+                yield from _DETAIL_FORMATTERS.get(type(details), _format_other)(details)
             
-        Returns:
-            Подробное объяснение
-        """
-        explanation = []
-        explanation.append("=" * 60)
-        explanation.append("ОБЪЯСНЕНИЕ ДИАГНОСТИКИ")
-        explanation.append("=" * 60)
+            yield NL_SEP
         
-        explanation.append(f"\nНаблюдаемые симптомы ({len(symptoms)}):")
+        return "\n".join(_lines())
+    
+    def _diagnosis_lines(self, symptoms: List[str],
+                         diagnosis_results: List[tuple]) -> Iterator[str]:
+        """Сформировать строки объяснения диагностики"""
+        yield SEP
+        yield "ОБЪЯСНЕНИЕ ДИАГНОСТИКИ"
+        yield SEP
+        
+        yield f"\nНаблюдаемые симптомы ({len(symptoms)}):"
         for symptom in symptoms:
-            explanation.append(f"  • {symptom}")
+            yield f"  • {symptom}"
         
         if not diagnosis_results:
-            explanation.append("\nРезультат: Не найдено заболеваний с указанными симптомами.")
-            explanation.append("\nВозможные причины:")
-            explanation.append("  - Симптомы не соответствуют ни одному заболеванию в базе знаний")
-            explanation.append("  - Необходимо дополнительное обследование")
+            yield "\nРезультат: Не найдено заболеваний с указанными симптомами."
+            yield "\nВозможные причины:"
+            yield "  - Симптомы не соответствуют ни одному заболеванию в базе знаний"
+            yield "  - Необходимо дополнительное обследование"
         else:
-            explanation.append(f"\nНайдено возможных заболеваний: {len(diagnosis_results)}")
-            explanation.append("\nАнализ по каждому заболеванию:\n")
+            yield f"\nНайдено возможных заболеваний: {len(diagnosis_results)}"
+            yield "\nАнализ по каждому заболеванию:\n"
             
             for i, (disease, confidence, matched_symptoms) in enumerate(diagnosis_results, 1):
-                explanation.append(f"{i}. {disease}")
-                explanation.append(f"   Уверенность: {confidence:.1%}")
-                explanation.append(f"   Совпавшие симптомы ({len(matched_symptoms)}):")
+                yield f"{i}. {disease}"
+                yield f"   Уверенность: {format_confidence(confidence)}"
+                yield f"   Совпавшие симптомы ({len(matched_symptoms)}):"
                 for symptom in matched_symptoms:
-                    explanation.append(f"     ✓ {symptom}")
+                    yield f"     ✓ {symptom}"
                 
                 # Получить все симптомы заболевания
-                all_symptoms = self.engine.get_symptoms(disease)
-                missing_symptoms = [s for s in all_symptoms if s not in matched_symptoms]
+                all_symptoms = self._get_symptoms(disease)
+                matched_set = set(matched_symptoms)
+                missing_symptoms = [s for s in all_symptoms if s not in matched_set]
                 
                 if missing_symptoms:
-                    explanation.append(f"   Отсутствующие симптомы ({len(missing_symptoms)}):")
+                    yield f"   Отсутствующие симптомы ({len(missing_symptoms)}):"
                     for symptom in missing_symptoms:
-                        explanation.append(f"     ✗ {symptom}")
+                        yield f"     ✗ {symptom}"
                 
                 # Получить методы лечения
-                treatments = self.engine.get_treatment(disease)
+                treatments = self._get_treatments(disease)
                 if treatments:
-                    explanation.append(f"   Рекомендуемое лечение:")
+                    yield f"   Рекомендуемое лечение:"
                     for treatment in treatments:
-                        explanation.append(f"     → {treatment}")
+                        yield f"     → {treatment}"
                 
-                explanation.append("")
+                yield ""
             
             # Рекомендации
-            explanation.append("РЕКОМЕНДАЦИИ:")
+            yield "РЕКОМЕНДАЦИИ:"
             best_match = diagnosis_results[0]
             if best_match[1] >= 0.8:
-                explanation.append(f"  Высокая вероятность: {best_match[0]}")
-                explanation.append(f"  Рекомендуется начать соответствующее лечение.")
+                yield f"  Высокая вероятность: {best_match[0]}"
+                yield f"  Рекомендуется начать соответствующее лечение."
             elif best_match[1] >= 0.5:
-                explanation.append(f"  Средняя вероятность: {best_match[0]}")
-                explanation.append(f"  Рекомендуется дополнительное обследование.")
+                yield f"  Средняя вероятность: {best_match[0]}"
+                yield f"  Рекомендуется дополнительное обследование."
             else:
-                explanation.append(f"  Низкая уверенность в диагнозе.")
-                explanation.append(f"  Необходима консультация специалиста.")
-        
-        explanation.append("\n" + "=" * 60)
+                yield f"  Низкая уверенность в диагнозе."
+                yield f"  Необходима консультация специалиста."
         
-        return "\n".join(explanation)
+        yield NL_SEP
     
-    def explain_subtype_check(self, concept1: str, concept2: str, 
-                             result: bool) -> str:
+    def explain_diagnosis(self, symptoms: List[str], 
+                         diagnosis_results: List[tuple]) -> str:
         """
-        Объяснить проверку подтипа
+        Объяснить результаты диагностики
         
         Args:
-            concept1: Проверяемый концепт
-            concept2: Родительский концепт
-            result: Результат проверки
+            symptoms: Список симптомов
+            diagnosis_results: Результаты диагностики
             
         Returns:
-            Объяснение
+            Подробное объяснение
+        """
+        return "\n".join(self._diagnosis_lines(symptoms, diagnosis_results))
+    
+    def write_diagnosis(self, symptoms: List[str], diagnosis_results: List[tuple],
+                        *, file: Optional[TextIO] = None):
+        """
+        Вывести объяснение диагностики построчно, не собирая общий текст
+        
+        Args:
+            symptoms: Список симптомов
+            diagnosis_results: Результаты диагностики
+            file: Поток вывода (по умолчанию sys.stdout)
         """
-        explanation = []
-        explanation.append("=" * 60)
-        explanation.append("ОБЪЯСНЕНИЕ ПРОВЕРКИ ПОДТИПА")
-        explanation.append("=" * 60)
+        _write_lines(self._diagnosis_lines(symptoms, diagnosis_results), file)
+    
+    def _subtype_check_lines(self, concept1: str, concept2: str,
+                             result: Optional[bool] = None) -> Iterator[str]:
+        """Сформировать строки объяснения проверки подтипа"""
+        if result is None:
+            result, links = self._check_subtype(concept1, concept2)
+        else:
+            # Извлечь цепочку связей из трассировки
+            links = [step.details for step in self.engine.get_trace_by_step("Найдена связь")]
         
-        explanation.append(f"\nВопрос: Является ли '{concept1}' подтипом '{concept2}'?")
-        explanation.append(f"Ответ: {'ДА' if result else 'НЕТ'}")
+        yield SEP
+        yield "ОБЪЯСНЕНИЕ ПРОВЕРКИ ПОДТИПА"
+        yield SEP
         
-        trace = self.engine.get_trace()
+        yield f"\nВопрос: Является ли '{concept1}' подтипом '{concept2}'?"
+        yield f"Ответ: {'ДА' if result else 'НЕТ'}"
         
         if result:
-            explanation.append("\nОбоснование:")
-            explanation.append(f"  Найдена цепочка отношений 'является_подтипом',")
-            explanation.append(f"  связывающая '{concept1}' с '{concept2}':")
+            yield "\nОбоснование:"
+            yield f"  Найдена цепочка отношений 'является_подтипом',"
+            yield f"  связывающая '{concept1}' с '{concept2}':"
             
-            # Извлечь цепочку связей из трассировки
-            for step in trace:
-                if step['step'] == "Найдена связь":
-                    explanation.append(f"    • {step['details']}")
+            for link in links:
+                yield f"    • {link}"
         else:
-            explanation.append("\nОбоснование:")
-            explanation.append(f"  Не найдено цепочки отношений 'является_подтипом',")
-            explanation.append(f"  связывающей '{concept1}' с '{concept2}'.")
+            yield "\nОбоснование:"
+            yield f"  Не найдено цепочки отношений 'является_подтипом',"
+            yield f"  связывающей '{concept1}' с '{concept2}'."
         
-        explanation.append("\n" + "=" * 60)
-        
-        return "\n".join(explanation)
+        yield NL_SEP
     
-    def explain_concept_info(self, concept: str, info: Dict[str, Any]) -> str:
+    def explain_subtype_check(self, concept1: str, concept2: str, 
+                             result: Optional[bool] = None) -> str:
         """
-        Объяснить информацию о концепте
+        Объяснить проверку подтипа
         
         Args:
-            concept: Название концепта
-            info: Информация о концепте
+            concept1: Проверяемый концепт
+            concept2: Родительский концепт
+            result: Результат проверки (если не указан, вычисляется
+                    без изменения трассировки)
             
         Returns:
             Объяснение
         """
-        explanation = []
-        explanation.append("=" * 60)
-        explanation.append(f"ИНФОРМАЦИЯ О КОНЦЕПТЕ: {concept}")
-        explanation.append("=" * 60)
+        return "\n".join(self._subtype_check_lines(concept1, concept2, result))
+    
+    def write_subtype_check(self, concept1: str, concept2: str,
+                            result: Optional[bool] = None,
+                            *, file: Optional[TextIO] = None):
+        """
+        Вывести объяснение проверки подтипа построчно, не собирая общий текст
+        
+        Args:
+            concept1: Проверяемый концепт
+            concept2: Родительский концепт
+            result: Результат проверки
+            file: Поток вывода (по умолчанию sys.stdout)
+        """
+        _write_lines(self._subtype_check_lines(concept1, concept2, result), file)
+    
+    def _concept_info_lines(self, concept: str, info: Dict[str, Any]) -> Iterator[str]:
+        """Сформировать строки с информацией о концепте"""
+        yield SEP
+        yield f"ИНФОРМАЦИЯ О КОНЦЕПТЕ: {concept}"
+        yield SEP
         
         if not info:
-            explanation.append("\nКонцепт не найден в базе знаний.")
-            return "\n".join(explanation)
+            yield "\nКонцепт не найден в базе знаний."
+            return
         
         # Атрибуты
-        if "атрибуты" in info and info["атрибуты"]:
-            explanation.append("\nАтрибуты:")
-            for key, value in info["атрибуты"].items():
-                explanation.append(f"  {key}: {value}")
+        if info.get(INFO_ATTRIBUTES):
+            yield "\nАтрибуты:"
+            for key, value in info[INFO_ATTRIBUTES].items():
+                yield f"  {key}: {value}"
         
         # Исходящие связи
-        if "исходящие_связи" in info and info["исходящие_связи"]:
-            explanation.append("\nИсходящие связи:")
-            for rel_type, targets in info["исходящие_связи"].items():
-                explanation.append(f"  {rel_type}:")
+        if info.get(INFO_OUTGOING):
+            yield "\nИсходящие связи:"
+            for rel_type, targets in info[INFO_OUTGOING].items():
+                yield f"  {rel_type}:"
                 for target in targets:
-                    explanation.append(f"    → {target}")
+                    yield f"    → {target}"
         
         # Входящие связи
-        if "входящие_связи" in info and info["входящие_связи"]:
-            explanation.append("\nВходящие связи:")
-            for rel_type, sources in info["входящие_связи"].items():
-                explanation.append(f"  {rel_type}:")
+        if info.get(INFO_INCOMING):
+            yield "\nВходящие связи:"
+            for rel_type, sources in info[INFO_INCOMING].items():
+                yield f"  {rel_type}:"
                 for source in sources:
-                    explanation.append(f"    ← {source}")
+                    yield f"    ← {source}"
         
-        explanation.append("\n" + "=" * 60)
-        
-        return "\n".join(explanation)
+        yield NL_SEP
     
-    def generate_summary(self, kb) -> str:
+    def explain_concept_info(self, concept: str, info: Dict[str, Any]) -> str:
         """
-        Сгенерировать общую сводку по базе знаний
+        Объяснить информацию о концепте
         
         Args:
-            kb: База знаний
+            concept: Название концепта
+            info: Информация о концепте
             
         Returns:
-            Сводка
+            Объяснение
+        """
+        return "\n".join(self._concept_info_lines(concept, info))
+    
+    def write_concept_info(self, concept: str, info: Dict[str, Any],
+                           *, file: Optional[TextIO] = None):
         """
-        summary = []
-        summary.append("=" * 60)
-        summary.append("СВОДКА ПО БАЗЕ ЗНАНИЙ")
-        summary.append("=" * 60)
+        Вывести информацию о концепте построчно, не собирая общий текст
+        
+        Args:
+            concept: Название концепта
+            info: Информация о концепте
+            file: Поток вывода (по умолчанию sys.stdout)
+        """
+        _write_lines(self._concept_info_lines(concept, info), file)
+    
+    def _summary_lines(self, kb) -> Iterator[str]:
+        """Сформировать строки сводки по базе знаний"""
+        yield SEP
+        yield "СВОДКА ПО БАЗЕ ЗНАНИЙ"
+        yield SEP
         
         # Статистика по узлам
-        node_types = {}
-        for node_name, node_attrs in kb.nodes.items():
-            node_type = node_attrs.get("type", "unknown")
-            node_types[node_type] = node_types.get(node_type, 0) + 1
+        node_types = Counter(node_attrs.get("type", "unknown")
+                             for node_attrs in kb.nodes.values())
         
-        summary.append(f"\nВсего узлов: {len(kb.nodes)}")
-        summary.append("Распределение по типам:")
+        yield f"\nВсего узлов: {len(kb.nodes)}"
+        yield "Распределение по типам:"
         for node_type, count in sorted(node_types.items()):
-            summary.append(f"  {node_type}: {count}")
+            yield f"  {node_type}: {count}"
         
-        # Статистика по связям
-        relation_types = {}
-        for rel in kb.relations:
-            rel_type = rel[1]
-            relation_types[rel_type] = relation_types.get(rel_type, 0) + 1
+        # Статистика по связям (счетчики поддерживаются базой знаний)
+        relation_types = kb.get_relation_type_counts()
         
-        summary.append(f"\nВсего связей: {len(kb.relations)}")
-        summary.append("Распределение по типам:")
+        yield f"\nВсего связей: {kb.relation_count()}"
+        yield "Распределение по типам:"
         for rel_type, count in sorted(relation_types.items()):
-            summary.append(f"  {rel_type}: {count}")
+            yield f"  {rel_type}: {count}"
         
         # Заболевания
-        diseases = kb.get_all_nodes_by_type("disease")
+        diseases = kb.get_sorted_nodes_by_type("disease")
         if diseases:
-            summary.append(f"\nЗаболевания в базе ({len(diseases)}):")
-            for disease in sorted(diseases):
-                summary.append(f"  • {disease}")
+            yield f"\nЗаболевания в базе ({len(diseases)}):"
+            for disease in diseases:
+                yield f"  • {disease}"
         
         # Симптомы
-        symptoms = kb.get_all_nodes_by_type("symptom")
+        symptoms = kb.get_sorted_nodes_by_type("symptom")
         if symptoms:
-            summary.append(f"\nСимптомы в базе ({len(symptoms)}):")
-            for symptom in sorted(symptoms):
-                summary.append(f"  • {symptom}")
+            yield f"\nСимптомы в базе ({len(symptoms)}):"
+            for symptom in symptoms:
+                yield f"  • {symptom}"
         
-        summary.append("\n" + "=" * 60)
+        yield NL_SEP
+    
+    def generate_summary(self, kb) -> str:
+        """
+        Сгенерировать общую сводку по базе знаний
+        
+        Args:
+            kb: База знаний
+            
+        Returns:
+            Сводка
+        """
+        return "\n".join(self._summary_lines(kb))
+    
+    def write_summary(self, kb, *, file: Optional[TextIO] = None):
+        """
+        Вывести сводку по базе знаний построчно, не собирая общий текст
         
-        return "\n".join(summary)
+        Args:
+            kb: База знаний
+            file: Поток вывода (по умолчанию sys.stdout)
+        """
+        _write_lines(self._summary_lines(kb), file)
     
     def explain_why_question(self, question: str, answer: Any) -> str:
         """
@@ -283,28 +406,28 @@ class ExplanationComponent:
         Returns:
             Объяснение
         """
-        explanation = []
-        explanation.append("=" * 60)
-        explanation.append("ОБЪЯСНЕНИЕ")
-        explanation.append("=" * 60)
-        
-        explanation.append(f"\nВопрос: {question}")
-        explanation.append(f"Ответ: {answer}")
-        
-        explanation.append("\nОбоснование:")
-        trace = self.engine.get_trace()
-        
-        if trace:
-            explanation.append("  Логический вывод основан на следующих шагах:")
-            for i, step in enumerate(trace, 1):
-                if step['step'] not in ["Начало запроса", "Результат"]:
-                    explanation.append(f"  {i}. {step['step']}: {step['details']}")
-        else:
-            explanation.append("  Ответ получен напрямую из базы знаний.")
-        
-        explanation.append("\n" + "=" * 60)
+        def _lines():
+            yield SEP
+            yield "ОБЪЯСНЕНИЕ"
+            yield SEP
+            
+            yield f"\nВопрос: {question}"
+            yield f"Ответ: {answer}"
+            
+            yield "\nОбоснование:"
+            trace = self.engine.get_trace()
+            
+            if trace:
+                yield "  Логический вывод основан на следующих шагах:"
+                for i, step in enumerate(trace, 1):
+                    if step.step not in ["Начало запроса", "Результат"]:
+                        yield f"  {i}. {step.step}: {step.details}"
+            else:
+                yield "  Ответ получен напрямую из базы знаний."
+            
+            yield NL_SEP
         
-        return "\n".join(explanation)
+        return "\n".join(_lines())
 
 
 if __name__ == "__main__":
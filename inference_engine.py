@@ -3,8 +3,69 @@
 Реализует различные типы запросов к базе знаний
 """
 
-from typing import List, Dict, Set, Tuple, Any
-from semantic_network import SemanticNetwork
+import heapq
+import sys
+from array import array
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
+from typing import List, Dict, Set, Tuple, Any, FrozenSet, Optional, NamedTuple, Iterator
+from semantic_network import SemanticNetwork, REL_SUBTYPE, REL_HAS_SYMPTOM, REL_TREATED_BY
+
+
+# Ключи словаря с информацией о концепте (интернированы для быстрых
+# сравнений при поиске в словарях)
+INFO_NODE = sys.intern("узел")
+INFO_ATTRIBUTES = sys.intern("атрибуты")
+INFO_OUTGOING = sys.intern("исходящие_связи")
+INFO_INCOMING = sys.intern("входящие_связи")
+
+
+@dataclass
+class ConceptDescription:
+    """
+    Описание концепта, собранное за один проход по его связям
+    """
+    concept: str
+    # Результаты проверок подтипа: {родительский_концепт: True/False}
+    subtype_checks: Dict[str, bool]
+    # Информация о концепте (в формате get_all_related_info)
+    info: Dict[str, Any]
+    # Методы лечения
+    treatments: List[str]
+
+
+# Уверенность - доля совпавших симптомов, поэтому различных значений немного;
+# размер кэша ограничен, чтобы произвольные значения не копились в памяти
+@lru_cache(maxsize=256)
+def format_confidence(confidence: float) -> str:
+    """Отформатировать уверенность в процентах (частые значения берутся из кэша)"""
+    return f"{confidence:.1%}"
+
+
+class DiagnosisResult(NamedTuple):
+    """
+    Результат диагностики для одного заболевания
+    Распаковывается как кортеж (заболевание, уверенность, совпавшие_симптомы)
+    """
+    disease: str
+    confidence: float
+    matched_symptoms: List[str]
+    
+    @property
+    def confidence_str(self) -> str:
+        """Уверенность в процентах, например '80.0%'"""
+        return format_confidence(self.confidence)
+
+
+class TraceStep(NamedTuple):
+    """
+    Шаг трассировки вывода
+    Компактнее словаря: без словаря атрибутов на каждый шаг
+    """
+    step: str
+    details: Any
 
 
 class InferenceEngine:
@@ -21,11 +82,240 @@ class InferenceEngine:
             knowledge_base: База знаний (семантическая сеть)
         """
         self.kb = knowledge_base
-        self.inference_trace = []  # Трассировка вывода для объяснений
+        self.inference_trace: List[TraceStep] = []  # Трассировка вывода для объяснений
+        # Если False, шаги трассировки не записываются (пакетные запросы)
+        self.tracing_enabled = True
+        # Шаги трассировки, сгруппированные по названию шага
+        self._trace_by_step: Dict[str, List[TraceStep]] = defaultdict(list)
+        
+        # Транзитивное замыкание отношения "является_подтипом" по id узлов:
+        # ancestors_closure[id] - битовое множество (int) всех предков, включая
+        # сам узел: бит j установлен, если узел j - предок узла id
+        self.ancestors_closure: List[int] = []
+        # Прямые родители: _parents[id] - массив id родительских узлов
+        self._parents: List[array] = []
+        # Имена узлов замыкания по id: узлы сети, затем концы связей,
+        # которых нет среди узлов (например, после импорта неполных данных)
+        self._closure_names: List[str] = []
+        self._closure_version = None
+        self.build_ancestors_closure()
+        
+        # Битовые маски симптомов для быстрого отбора заболеваний при диагностике:
+        # каждому симптому соответствует бит, каждому заболеванию - маска его симптомов
+        self._symptom_bits: Dict[str, int] = {}
+        self._disease_masks: Dict[str, int] = {}
+        # Множества симптомов заболеваний: {заболевание: frozenset(симптомы)}
+        self._symptoms_by_disease: Dict[str, FrozenSet[str]] = {}
+        # Строки "матрицы" заболевание x симптом в порядке заболеваний базы знаний:
+        # (заболевание, маска симптомов, множество симптомов)
+        self._disease_rows: List[Tuple[str, int, FrozenSet[str]]] = []
+        self._masks_version = None
+        
+    def build_ancestors_closure(self):
+        """
+        Предвычислить множества предков для всех узлов базы знаний
+        
+        Выполняет поиск в ширину по отношениям "является_подтипом" из каждого
+        узла один раз, после чего проверка подтипа сводится к проверке бита.
+        Узлы представлены целочисленными идентификаторами базы знаний, множество
+        предков узла - целым числом, в котором установлены биты предков.
+        """
+        kb_node_id = self.kb.get_node_id
+        names = [self.kb.get_node_name(i) for i in range(self.kb.node_count())]
+        parents = [array('I') for _ in names]
+        extra_ids: Dict[str, int] = {}
+        
+        def node_id(name: str) -> int:
+            # Концы связей, которых нет среди узлов, получают id после узлов сети
+            result = kb_node_id(name)
+            if result is None:
+                result = extra_ids.get(name)
+                if result is None:
+                    result = extra_ids[name] = len(names)
+                    names.append(name)
+                    parents.append(array('I'))
+            return result
+        
+        for source, _, target in self.kb.get_relations_by_type(REL_SUBTYPE):
+            source_id = node_id(source)
+            parents[source_id].append(node_id(target))
+        
+        closure = []
+        for start in range(len(parents)):
+            visited = 1 << start
+            queue = deque((start,))
+            
+            while queue:
+                current = queue.popleft()
+                
+                # Отмечаем узел при постановке в очередь, чтобы предки,
+                # достижимые несколькими путями, не попадали в нее повторно
+                for parent in parents[current]:
+                    if not visited >> parent & 1:
+                        visited |= 1 << parent
+                        queue.append(parent)
+            
+            closure.append(visited)
+        
+        self._parents = parents
+        self._closure_names = names
+        self.ancestors_closure = closure
+        self._closure_version = self.kb.version
+    
+    def _build_symptom_masks(self):
+        """
+        Построить битовые маски и множества симптомов заболеваний
+        за один проход по связям "имеет_симптом"
+        """
+        symptom_bits: Dict[str, int] = {}
+        disease_masks: Dict[str, int] = {}
+        disease_symptoms: Dict[str, Set[str]] = {}
+        
+        for source, _, target in self.kb.get_relations_by_type(REL_HAS_SYMPTOM):
+            bit = symptom_bits.get(target)
+            if bit is None:
+                bit = symptom_bits[target] = 1 << len(symptom_bits)
+            disease_masks[source] = disease_masks.get(source, 0) | bit
+            disease_symptoms.setdefault(source, set()).add(target)
+        
+        self._symptom_bits = symptom_bits
+        self._disease_masks = disease_masks
+        self._symptoms_by_disease = {d: frozenset(s) for d, s in disease_symptoms.items()}
+        self._disease_rows = [
+            (disease, disease_masks[disease], self._symptoms_by_disease[disease])
+            for disease in self.kb.get_all_nodes_by_type("disease")
+            if disease in disease_masks
+        ]
+        self._masks_version = self.kb.version
+    
+    def _is_ancestor(self, concept1: str, concept2: str) -> bool:
+        """
+        Проверить по замыканию, что concept2 - предок concept1 (или сам concept1)
+        
+        Замыкание перестраивается, если база знаний изменилась.
+        """
+        if self._closure_version != self.kb.version:
+            self.build_ancestors_closure()
+        
+        id1 = self.kb.get_node_id(concept1)
+        id2 = self.kb.get_node_id(concept2)
+        if id1 is None or id2 is None:
+            return False
+        return bool(self.ancestors_closure[id1] >> id2 & 1)
+    
+    def check_subtype(self, concept1: str, concept2: str) -> bool:
+        """
+        Проверить, является ли concept1 подтипом concept2, не записывая
+        трассировку (результат тот же, что у is_subtype_of)
+        """
+        return self._is_ancestor(concept1, concept2)
+    
+    def get_subtype_chain(self, concept1: str, concept2: str) -> List[Tuple[str, str, str]]:
+        """
+        Получить цепочку связей "является_подтипом" от concept1 к concept2
+        
+        Args:
+            concept1: Проверяемый концепт
+            concept2: Родительский концепт
+            
+        Returns:
+            Список связей, образующих цепочку (пустой, если цепочки нет)
+        """
+        if not self._is_ancestor(concept1, concept2):
+            return []
+        
+        name = self._closure_names.__getitem__
+        closure = self.ancestors_closure
+        start = self.kb.get_node_id(concept1)
+        target = self.kb.get_node_id(concept2)
+        
+        # Поиск в ширину по родителям, из которых concept2 по-прежнему
+        # достижим; previous[id] - узел, из которого пришли в id.
+        # Каждый узел посещается один раз, поэтому циклы в отношении
+        # "является_подтипом" не приводят к зацикливанию
+        previous = {start: start}
+        queue = deque((start,))
+        while target not in previous:
+            current = queue.popleft()
+            for parent in self._parents[current]:
+                if parent not in previous and closure[parent] >> target & 1:
+                    previous[parent] = current
+                    queue.append(parent)
+        
+        # Восстанавливаем цепочку от concept2 обратно к concept1
+        chain = []
+        current = target
+        while current != start:
+            child = previous[current]
+            chain.append((name(child), REL_SUBTYPE, name(current)))
+            current = child
+        chain.reverse()
+        return chain
+        
+    def _subtype_search_steps(self, concept1: str,
+                              concept2: str) -> Iterator[Tuple[str, str]]:
+        """
+        Шаги поиска в ширину по связям "является_подтипом" от concept1 к concept2
+        
+        Порядок и текст шагов те же, что в трассировке is_subtype_of:
+        "Проверка узла" для каждого посещенного узла и "Найдена связь"
+        для каждой просмотренной связи, а не только для связей цепочки.
+        
+        Args:
+            concept1: Проверяемый концепт
+            concept2: Родительский концепт
+            
+        Returns:
+            Итератор пар (шаг, детали)
+        """
+        visited = set()
+        queue = deque((concept1,))
+        
+        while queue:
+            current = queue.popleft()
+            
+            if current in visited:
+                continue
+            
+            visited.add(current)
+            yield "Проверка узла", current
+            
+            if current == concept2:
+                return
+            
+            for parent in self.kb.get_targets(current, REL_SUBTYPE):
+                queue.append(parent)
+                yield "Найдена связь", f"{current} -> {REL_SUBTYPE} -> {parent}"
+    
+    def get_subtype_links(self, concept1: str, concept2: str) -> List[str]:
+        """
+        Получить связи, просмотренные при проверке подтипа, не записывая трассировку
+        
+        Совпадает с шагами "Найдена связь" трассировки is_subtype_of.
+        
+        Args:
+            concept1: Проверяемый концепт
+            concept2: Родительский концепт
+            
+        Returns:
+            Список связей в виде строк "источник -> отношение -> цель"
+        """
+        return [details for step, details in self._subtype_search_steps(concept1, concept2)
+                if step == "Найдена связь"]
         
     def clear_trace(self):
         """Очистить трассировку вывода"""
         self.inference_trace = []
+        self._trace_by_step = defaultdict(list)
+        
+    def set_tracing(self, enabled: bool):
+        """
+        Включить или выключить запись трассировки вывода
+        
+        Args:
+            enabled: True - записывать шаги, False - пропускать их
+        """
+        self.tracing_enabled = enabled
         
     def add_trace(self, step: str, details: Any):
         """
@@ -35,15 +325,20 @@ class InferenceEngine:
             step: Описание шага
             details: Детали шага
         """
-        self.inference_trace.append({
-            "step": step,
-            "details": details
-        })
+        if not self.tracing_enabled:
+            return
+        entry = TraceStep(step, details)
+        self.inference_trace.append(entry)
+        self._trace_by_step[step].append(entry)
     
-    def get_trace(self) -> List[Dict]:
+    def get_trace(self) -> List[TraceStep]:
         """Получить трассировку вывода"""
         return self.inference_trace
     
+    def get_trace_by_step(self, step: str) -> List[TraceStep]:
+        """Получить шаги трассировки с заданным названием (в порядке добавления)"""
+        return self._trace_by_step.get(step, [])
+    
     # ========== Тип запроса 1: "Является ли X подтипом Y?" ==========
     
     def is_subtype_of(self, concept1: str, concept2: str) -> bool:
@@ -69,28 +364,17 @@ class InferenceEngine:
             self.add_trace("Ошибка", f"Узел '{concept2}' не найден")
             return False
         
-        # Поиск в ширину по отношениям "является_подтипом"
-        visited = set()
-        queue = [concept1]
+        # Проверка по предвычисленному транзитивному замыканию
+        result = self._is_ancestor(concept1, concept2)
         
-        while queue:
-            current = queue.pop(0)
-            
-            if current in visited:
-                continue
-                
-            visited.add(current)
-            self.add_trace("Проверка узла", current)
-            
-            if current == concept2:
-                self.add_trace("Результат", f"'{concept1}' ЯВЛЯЕТСЯ подтипом '{concept2}'")
-                return True
-            
-            # Ищем родительские узлы
-            for rel in self.kb.get_relations_from(current):
-                if rel[1] == "является_подтипом":
-                    queue.append(rel[2])
-                    self.add_trace("Найдена связь", f"{rel[0]} -> {rel[1]} -> {rel[2]}")
+        # Просмотренные узлы и связи нужны только для трассировки
+        if self.tracing_enabled:
+            for step, details in self._subtype_search_steps(concept1, concept2):
+                self.add_trace(step, details)
+        
+        if result:
+            self.add_trace("Результат", f"'{concept1}' ЯВЛЯЕТСЯ подтипом '{concept2}'")
+            return True
         
         self.add_trace("Результат", f"'{concept1}' НЕ ЯВЛЯЕТСЯ подтипом '{concept2}'")
         return False
@@ -116,61 +400,77 @@ class InferenceEngine:
         
         symptoms = []
         
-        # Прямые симптомы
-        for rel in self.kb.get_relations_from(disease):
-            if rel[1] == "имеет_симптом":
-                symptoms.append(rel[2])
-                self.add_trace("Найден симптом", rel[2])
+        # Прямые симптомы (из индекса смежности)
+        for symptom in self.kb.get_targets(disease, REL_HAS_SYMPTOM):
+            symptoms.append(symptom)
+            self.add_trace("Найден симптом", symptom)
         
         self.add_trace("Результат", f"Найдено симптомов: {len(symptoms)}")
         return symptoms
     
     # ========== Тип запроса 3: "Какие заболевания имеют симптомы X?" ==========
     
-    def diagnose_by_symptoms(self, symptoms: List[str]) -> List[Tuple[str, float, List[str]]]:
+    def diagnose_by_symptoms(self, symptoms: List[str],
+                             top_k: Optional[int] = None) -> List[DiagnosisResult]:
         """
         Диагностировать заболевания по симптомам
         
         Args:
             symptoms: Список наблюдаемых симптомов
+            top_k: Вернуть только top_k наиболее вероятных заболеваний
+                   (None - вернуть все)
             
         Returns:
-            Список кортежей (заболевание, уверенность, совпавшие_симптомы)
-            отсортированный по убыванию уверенности
+            Список результатов DiagnosisResult (заболевание, уверенность,
+            совпавшие_симптомы), отсортированный по убыванию уверенности
         """
         self.clear_trace()
-        self.add_trace("Начало диагностики", f"Симптомы: {symptoms}")
+        if self.tracing_enabled:
+            self.add_trace("Начало диагностики", f"Симптомы: {symptoms}")
         
         # Найти все заболевания
         diseases = self.kb.get_all_nodes_by_type("disease")
         self.add_trace("Найдены заболевания", diseases)
         
+        if self._masks_version != self.kb.version:
+            self._build_symptom_masks()
+        
+        # Маска наблюдаемых симптомов
+        query_mask = 0
+        for symptom in symptoms:
+            query_mask |= self._symptom_bits.get(symptom, 0)
+        
         results = []
         
-        for disease in diseases:
-            # Получить симптомы заболевания
-            disease_symptoms = self.get_symptoms(disease)
+        # Один проход по предвычисленным строкам без поиска в словарях
+        for disease, disease_mask, disease_symptoms in self._disease_rows:
+            # Пропустить заболевания без общих симптомов (одна битовая операция)
+            if not disease_mask & query_mask:
+                continue
             
-            # Найти совпадающие симптомы
+            # Найти совпадающие симптомы (порядок - как в запросе)
             matching_symptoms = [s for s in symptoms if s in disease_symptoms]
             
             if matching_symptoms:
                 # Вычислить уверенность (процент совпадения)
-                confidence = len(matching_symptoms) / len(disease_symptoms) if disease_symptoms else 0
-                results.append((disease, confidence, matching_symptoms))
+                confidence = len(matching_symptoms) / len(disease_symptoms)
+                results.append(DiagnosisResult(disease, confidence, matching_symptoms))
                 
-                self.add_trace("Совпадение", {
-                    "заболевание": disease,
-                    "уверенность": f"{confidence:.2%}",
-                    "совпавшие_симптомы": matching_symptoms
-                })
-        
-        # Сортировка по убыванию уверенности
-        results.sort(key=lambda x: x[1], reverse=True)
+                if self.tracing_enabled:
+                    self.add_trace("Совпадение", {
+                        "заболевание": disease,
+                        "уверенность": f"{confidence:.2%}",
+                        "совпавшие_симптомы": matching_symptoms
+                    })
         
         self.add_trace("Результат диагностики", 
                       f"Найдено возможных заболеваний: {len(results)}")
         
+        # Сортировка по убыванию уверенности (частичная, если нужны только top_k)
+        if top_k is not None:
+            return heapq.nlargest(top_k, results, key=itemgetter(1))
+        
+        results.sort(key=itemgetter(1), reverse=True)
         return results
     
     # ========== Тип запроса 4: "Как лечить заболевание X?" ==========
@@ -194,10 +494,9 @@ class InferenceEngine:
         
         treatments = []
         
-        for rel in self.kb.get_relations_from(disease):
-            if rel[1] == "лечится":
-                treatments.append(rel[2])
-                self.add_trace("Найден метод лечения", rel[2])
+        for treatment in self.kb.get_targets(disease, REL_TREATED_BY):
+            treatments.append(treatment)
+            self.add_trace("Найден метод лечения", treatment)
         
         self.add_trace("Результат", f"Найдено методов лечения: {len(treatments)}")
         return treatments
@@ -223,11 +522,13 @@ class InferenceEngine:
         
         diseases = []
         
-        # Найти все узлы, которые являются подтипами данной категории
-        all_diseases = self.kb.get_all_nodes_by_type("disease")
+        # Все подтипы категории - одним обратным обходом от категории
+        subtypes = self.kb.descendants(category, REL_SUBTYPE)
+        # Как и is_subtype_of, считаем концепт подтипом самого себя
+        subtypes.add(category)
         
-        for disease in all_diseases:
-            if self.is_subtype_of(disease, category):
+        for disease in self.kb.get_all_nodes_by_type("disease"):
+            if disease in subtypes:
                 diseases.append(disease)
                 self.add_trace("Найдено заболевание", disease)
         
@@ -236,6 +537,41 @@ class InferenceEngine:
     
     # ========== Дополнительные методы вывода ==========
     
+    def _collect_related(self, concept: str,
+                         attributes: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Сгруппировать связи концепта по типу за один проход
+        
+        Общая часть get_all_related_info и describe.
+        
+        Args:
+            concept: Название концепта (должен быть в базе знаний)
+            attributes: Атрибуты концепта
+            
+        Returns:
+            Кортеж (информация в формате get_all_related_info, методы лечения)
+        """
+        # Группировка исходящих связей по типу; методы лечения собираются попутно
+        outgoing = defaultdict(list)
+        treatments = []
+        for source, rel_type, target in self.kb.get_relations_from(concept):
+            outgoing[rel_type].append(target)
+            if rel_type == REL_TREATED_BY:
+                treatments.append(target)
+        
+        # Группировка входящих связей по типу
+        incoming = defaultdict(list)
+        for source, rel_type, target in self.kb.get_relations_to(concept):
+            incoming[rel_type].append(source)
+        
+        info = {
+            INFO_NODE: concept,
+            INFO_ATTRIBUTES: attributes,
+            INFO_OUTGOING: dict(outgoing),
+            INFO_INCOMING: dict(incoming)
+        }
+        return info, treatments
+    
     def get_all_related_info(self, concept: str) -> Dict[str, Any]:
         """
         Получить всю информацию, связанную с концептом
@@ -249,34 +585,47 @@ class InferenceEngine:
         self.clear_trace()
         self.add_trace("Начало запроса", f"Сбор информации о '{concept}'")
         
-        if concept not in self.kb.nodes:
+        # Один поиск в словаре узлов и для проверки, и для атрибутов
+        attributes = self.kb.nodes.get(concept)
+        if attributes is None:
             self.add_trace("Ошибка", f"Концепт '{concept}' не найден")
             return {}
         
-        info = {
-            "узел": concept,
-            "атрибуты": self.kb.get_node(concept),
-            "исходящие_связи": {},
-            "входящие_связи": {}
-        }
-        
-        # Группировка исходящих связей по типу
-        for rel in self.kb.get_relations_from(concept):
-            rel_type = rel[1]
-            if rel_type not in info["исходящие_связи"]:
-                info["исходящие_связи"][rel_type] = []
-            info["исходящие_связи"][rel_type].append(rel[2])
-        
-        # Группировка входящих связей по типу
-        for rel in self.kb.get_relations_to(concept):
-            rel_type = rel[1]
-            if rel_type not in info["входящие_связи"]:
-                info["входящие_связи"][rel_type] = []
-            info["входящие_связи"][rel_type].append(rel[0])
+        info, _ = self._collect_related(concept, attributes)
         
         self.add_trace("Результат", "Информация собрана")
         return info
     
+    def describe(self, concept: str, ancestor_checks: List[str]) -> ConceptDescription:
+        """
+        Собрать полное описание концепта за один проход по его связям
+        
+        Объединяет проверки подтипа, get_all_related_info и get_treatment,
+        чтобы не обходить связи одного и того же узла несколько раз.
+        
+        Args:
+            concept: Название концепта
+            ancestor_checks: Концепты, для которых проверяется отношение подтипа
+            
+        Returns:
+            Описание концепта
+        """
+        self.clear_trace()
+        self.add_trace("Начало запроса", f"Описание концепта '{concept}'")
+        
+        # Один поиск в словаре узлов и для проверки, и для атрибутов
+        attributes = self.kb.nodes.get(concept)
+        if attributes is None:
+            self.add_trace("Ошибка", f"Концепт '{concept}' не найден")
+            return ConceptDescription(concept, {c: False for c in ancestor_checks}, {}, [])
+        
+        subtype_checks = {c: self._is_ancestor(concept, c) for c in ancestor_checks}
+        
+        info, treatments = self._collect_related(concept, attributes)
+        
+        self.add_trace("Результат", "Описание собрано")
+        return ConceptDescription(concept, subtype_checks, info, treatments)
+    
     def find_connection(self, concept1: str, concept2: str) -> List[List[Tuple[str, str, str]]]:
         """
         Найти связь между двумя концептами
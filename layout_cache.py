@@ -0,0 +1,114 @@
+"""
+Модуль дискового кэша раскладок графа
+Хранит вычисленные координаты узлов в JSON, чтобы не пересчитывать
+дорогие раскладки при каждом запуске визуализации
+"""
+
+import hashlib
+import json
+import os
+from typing import Callable, Dict, Iterable, Tuple
+
+
+# Каталог для кэша вычисленных раскладок графа
+LAYOUT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bodya_python")
+
+
+def layout_fingerprint(kind: str, nodes: Iterable[str],
+                       edges: Iterable[Tuple[str, str]]) -> str:
+    """
+    Вычислить ключ кэша раскладки
+    
+    Args:
+        kind: Вид раскладки (вместе с алгоритмом и параметрами)
+        nodes: Узлы графа
+        edges: Ребра графа (пары узлов)
+    
+    Returns:
+        Шестнадцатеричный отпечаток вида раскладки и множеств узлов и ребер
+    """
+    return hashlib.blake2b(
+        (kind + "|" + ",".join(sorted(nodes)) + "|" +
+         ",".join(f"{u}->{v}" for u, v in sorted(edges))).encode("utf-8"),
+        digest_size=8).hexdigest()
+
+
+def load_layout(path: str, nodes: Iterable[str]) -> Dict[str, Tuple[float, float]]:
+    """
+    Загрузить раскладку из файла кэша
+    
+    Args:
+        path: Путь к файлу кэша
+        nodes: Узлы, для которых должны быть координаты
+    
+    Returns:
+        Словарь {узел: (x, y)}
+    
+    Raises:
+        Exception: Если файла нет, он поврежден или не подходит к графу
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    pos = {node: (float(x), float(y)) for node, (x, y) in data.items()}
+    if pos.keys() != set(nodes):
+        raise ValueError(f"Раскладка в {path} не соответствует графу")
+    return pos
+
+
+def save_layout(path: str, pos: Dict[str, Tuple[float, float]]):
+    """
+    Сохранить раскладку в файл кэша
+    
+    Файл сначала записывается во временный и затем переименовывается,
+    поэтому прерванная запись не оставляет поврежденного кэша.
+    
+    Args:
+        path: Путь к файлу кэша
+        pos: Словарь {узел: (x, y)}
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({str(node): [float(x), float(y)] for node, (x, y) in pos.items()},
+                  f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def cached_layout(kind: str, nodes: Iterable[str], edges: Iterable[Tuple[str, str]],
+                  compute: Callable[[], Dict],
+                  cache_dir: str = LAYOUT_CACHE_DIR) -> Dict[str, Tuple[float, float]]:
+    """
+    Получить раскладку графа из дискового кэша или вычислить и сохранить ее
+    
+    Ключ кэша - вид раскладки и отпечаток множества узлов и ребер графа,
+    поэтому после изменения базы знаний раскладка вычисляется заново.
+    Координаты хранятся в JSON: файл кэша не может выполнить код при загрузке.
+    
+    Args:
+        kind: Вид раскладки; должен однозначно определять алгоритм и параметры,
+            иначе под одним ключом окажутся разные раскладки
+        nodes: Узлы графа
+        edges: Ребра графа (пары узлов)
+        compute: Функция, вычисляющая раскладку; ее исключения не перехватываются,
+            и в этом случае в кэш ничего не записывается
+        cache_dir: Каталог кэша
+    
+    Returns:
+        Словарь {узел: (x, y)}
+    """
+    nodes = list(nodes)
+    path = os.path.join(cache_dir, f"layout_{layout_fingerprint(kind, nodes, edges)}.json")
+    
+    try:
+        return load_layout(path, nodes)
+    except Exception:
+        # Нет файла, файл поврежден или устарел - раскладка вычисляется заново
+        pass
+    
+    pos = compute()
+    try:
+        save_layout(path, pos)
+    except OSError:
+        # Кэш необязателен: без него раскладка просто вычисляется каждый раз
+        pass
+    return {node: (float(x), float(y)) for node, (x, y) in pos.items()}
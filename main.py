@@ -4,11 +4,33 @@
 """
 
 import sys
+from typing import List
 from semantic_network import SemanticNetwork, create_medical_knowledge_base
 from inference_engine import InferenceEngine
 from explanation import ExplanationComponent
 
 
+# Текст главного меню (собирается один раз и выводится одним вызовом write)
+MENU = "\n".join([
+    "",
+    "=" * 60,
+    "ЭКСПЕРТНАЯ СИСТЕМА - МЕДИЦИНСКАЯ ДИАГНОСТИКА",
+    "=" * 60,
+    "\nДоступные операции:",
+    "  1. Диагностика по симптомам",
+    "  2. Проверить, является ли X подтипом Y",
+    "  3. Получить симптомы заболевания",
+    "  4. Получить методы лечения",
+    "  5. Получить заболевания по категории",
+    "  6. Получить информацию о концепте",
+    "  7. Показать сводку по базе знаний",
+    "  8. Список всех заболеваний",
+    "  9. Список всех симптомов",
+    "  0. Выход",
+    "=" * 60,
+]) + "\n"
+
+
 class ExpertSystem:
     """
     Оболочка экспертной системы
@@ -28,34 +50,38 @@ class ExpertSystem:
         # Создание компонента объяснения
         self.explainer = ExplanationComponent(self.engine)
         
+        # Таблица операций меню: {пункт: обработчик}
+        # Обработчик возвращает True, если операция выполнена, и False при ошибке ввода
+        self._actions = {
+            '1': self.diagnose_interactive,
+            '2': self.check_subtype_interactive,
+            '3': self.get_symptoms_interactive,
+            '4': self.get_treatment_interactive,
+            '5': self.get_diseases_by_category_interactive,
+            '6': self.get_concept_info_interactive,
+            '7': self.show_summary,
+            '8': self.list_diseases,
+            '9': self.list_symptoms,
+        }
+        
         print("Экспертная система готова к работе!\n")
     
+    def print_numbered(self, items: List[str]):
+        """Вывести нумерованный список (одним вызовом print)"""
+        if items:
+            print("\n".join(f"  {i}. {item}" for i, item in enumerate(items, 1)))
+    
     def show_menu(self):
         """Показать главное меню"""
-        print("\n" + "=" * 60)
-        print("ЭКСПЕРТНАЯ СИСТЕМА - МЕДИЦИНСКАЯ ДИАГНОСТИКА")
-        print("=" * 60)
-        print("\nДоступные операции:")
-        print("  1. Диагностика по симптомам")
-        print("  2. Проверить, является ли X подтипом Y")
-        print("  3. Получить симптомы заболевания")
-        print("  4. Получить методы лечения")
-        print("  5. Получить заболевания по категории")
-        print("  6. Получить информацию о концепте")
-        print("  7. Показать сводку по базе знаний")
-        print("  8. Список всех заболеваний")
-        print("  9. Список всех симптомов")
-        print("  0. Выход")
-        print("=" * 60)
+        sys.stdout.write(MENU)
     
-    def diagnose_interactive(self):
+    def diagnose_interactive(self) -> bool:
         """Интерактивная диагностика"""
         print("\n--- ДИАГНОСТИКА ПО СИМПТОМАМ ---")
         print("\nДоступные симптомы:")
         
         symptoms = self.kb.get_all_nodes_by_type("symptom")
-        for i, symptom in enumerate(symptoms, 1):
-            print(f"  {i}. {symptom}")
+        self.print_numbered(symptoms)
         
         print("\nВведите номера симптомов через запятую (например: 1,3,5)")
         print("или введите 'все' для выбора всех симптомов:")
@@ -66,26 +92,34 @@ class ExpertSystem:
             selected_symptoms = symptoms
         else:
             try:
-                indices = [int(x.strip()) - 1 for x in choice.split(',')]
-                selected_symptoms = [symptoms[i] for i in indices if 0 <= i < len(symptoms)]
-            except (ValueError, IndexError):
+                # int() сам отбрасывает пробелы вокруг числа
+                count = len(symptoms)
+                selected_symptoms = [symptoms[number - 1]
+                                     for number in map(int, choice.split(','))
+                                     if 0 < number <= count]
+            except ValueError:
                 print("Ошибка: неверный ввод!")
-                return
+                return False
         
         if not selected_symptoms:
             print("Не выбрано ни одного симптома!")
-            return
+            return False
         
         print(f"\nВыбранные симптомы: {', '.join(selected_symptoms)}")
         print("\nВыполняется диагностика...\n")
         
-        # Выполнить диагностику
-        results = self.engine.diagnose_by_symptoms(selected_symptoms)
+        # Выполнить диагностику (без трассировки - объяснение строится по результатам)
+        self.engine.set_tracing(False)
+        try:
+            results = self.engine.diagnose_by_symptoms(selected_symptoms)
+        finally:
+            self.engine.set_tracing(True)
         
         # Показать объяснение
         print(self.explainer.explain_diagnosis(selected_symptoms, results))
+        return True
     
-    def check_subtype_interactive(self):
+    def check_subtype_interactive(self) -> bool:
         """Интерактивная проверка подтипа"""
         print("\n--- ПРОВЕРКА ПОДТИПА ---")
         
@@ -94,21 +128,21 @@ class ExpertSystem:
         
         if not concept1 or not concept2:
             print("Ошибка: оба концепта должны быть указаны!")
-            return
+            return False
         
         print(f"\nПроверка: является ли '{concept1}' подтипом '{concept2}'...\n")
         
         result = self.engine.is_subtype_of(concept1, concept2)
         print(self.explainer.explain_subtype_check(concept1, concept2, result))
+        return True
     
-    def get_symptoms_interactive(self):
+    def get_symptoms_interactive(self) -> bool:
         """Интерактивное получение симптомов"""
         print("\n--- СИМПТОМЫ ЗАБОЛЕВАНИЯ ---")
         
         diseases = self.kb.get_all_nodes_by_type("disease")
         print("\nДоступные заболевания:")
-        for i, disease in enumerate(diseases, 1):
-            print(f"  {i}. {disease}")
+        self.print_numbered(diseases)
         
         choice = input("\nВведите номер заболевания: ").strip()
         
@@ -118,10 +152,10 @@ class ExpertSystem:
                 disease = diseases[index]
             else:
                 print("Ошибка: неверный номер!")
-                return
+                return False
         except ValueError:
             print("Ошибка: введите число!")
-            return
+            return False
         
         print(f"\nПолучение симптомов для '{disease}'...\n")
         
@@ -135,15 +169,15 @@ class ExpertSystem:
             print("  Симптомы не найдены")
         
         print("\n" + self.explainer.explain_last_inference())
+        return True
     
-    def get_treatment_interactive(self):
+    def get_treatment_interactive(self) -> bool:
         """Интерактивное получение лечения"""
         print("\n--- МЕТОДЫ ЛЕЧЕНИЯ ---")
         
         diseases = self.kb.get_all_nodes_by_type("disease")
         print("\nДоступные заболевания:")
-        for i, disease in enumerate(diseases, 1):
-            print(f"  {i}. {disease}")
+        self.print_numbered(diseases)
         
         choice = input("\nВведите номер заболевания: ").strip()
         
@@ -153,10 +187,10 @@ class ExpertSystem:
                 disease = diseases[index]
             else:
                 print("Ошибка: неверный номер!")
-                return
+                return False
         except ValueError:
             print("Ошибка: введите число!")
-            return
+            return False
         
         print(f"\nПолучение методов лечения для '{disease}'...\n")
         
@@ -170,15 +204,15 @@ class ExpertSystem:
             print("  Методы лечения не найдены")
         
         print("\n" + self.explainer.explain_last_inference())
+        return True
     
-    def get_diseases_by_category_interactive(self):
+    def get_diseases_by_category_interactive(self) -> bool:
         """Интерактивное получение заболеваний по категории"""
         print("\n--- ЗАБОЛЕВАНИЯ ПО КАТЕГОРИИ ---")
         
         categories = self.kb.get_all_nodes_by_type("category")
         print("\nДоступные категории:")
-        for i, category in enumerate(categories, 1):
-            print(f"  {i}. {category}")
+        self.print_numbered(categories)
         
         choice = input("\nВведите номер категории: ").strip()
         
@@ -188,10 +222,10 @@ class ExpertSystem:
                 category = categories[index]
             else:
                 print("Ошибка: неверный номер!")
-                return
+                return False
         except ValueError:
             print("Ошибка: введите число!")
-            return
+            return False
         
         print(f"\nПолучение заболеваний категории '{category}'...\n")
         
@@ -203,8 +237,9 @@ class ExpertSystem:
                 print(f"  • {disease}")
         else:
             print("  Заболевания не найдены")
+        return True
     
-    def get_concept_info_interactive(self):
+    def get_concept_info_interactive(self) -> bool:
         """Интерактивное получение информации о концепте"""
         print("\n--- ИНФОРМАЦИЯ О КОНЦЕПТЕ ---")
         
@@ -212,40 +247,45 @@ class ExpertSystem:
         
         if not concept:
             print("Ошибка: название концепта не может быть пустым!")
-            return
+            return False
         
         print(f"\nПолучение информации о '{concept}'...\n")
         
         info = self.engine.get_all_related_info(concept)
         print(self.explainer.explain_concept_info(concept, info))
+        return True
     
-    def show_summary(self):
+    def show_summary(self) -> bool:
         """Показать сводку по базе знаний"""
         print(self.explainer.generate_summary(self.kb))
+        return True
     
-    def list_diseases(self):
+    def list_diseases(self) -> bool:
         """Показать список всех заболеваний"""
         print("\n--- СПИСОК ЗАБОЛЕВАНИЙ ---")
-        diseases = self.kb.get_all_nodes_by_type("disease")
-        
-        for disease in sorted(diseases):
+        for disease in self.kb.get_sorted_nodes_by_type("disease"):
             node_info = self.kb.get_node(disease)
             print(f"\n{disease}")
             if "description" in node_info:
                 print(f"  Описание: {node_info['description']}")
             if "severity" in node_info:
                 print(f"  Тяжесть: {node_info['severity']}")
+        return True
     
-    def list_symptoms(self):
+    def list_symptoms(self) -> bool:
         """Показать список всех симптомов"""
         print("\n--- СПИСОК СИМПТОМОВ ---")
-        symptoms = self.kb.get_all_nodes_by_type("symptom")
-        
-        for symptom in sorted(symptoms):
+        for symptom in self.kb.get_sorted_nodes_by_type("symptom"):
             node_info = self.kb.get_node(symptom)
             print(f"\n{symptom}")
             if "description" in node_info:
                 print(f"  Описание: {node_info['description']}")
+        return True
+    
+    def invalid_choice(self) -> bool:
+        """Сообщить о неверном пункте меню"""
+        print("\nОшибка: неверный выбор! Попробуйте снова.")
+        return False
     
     def run(self):
         """Запустить экспертную систему"""
@@ -257,28 +297,11 @@ class ExpertSystem:
                 print("\nЗавершение работы экспертной системы...")
                 print("До свидания!")
                 break
-            elif choice == '1':
-                self.diagnose_interactive()
-            elif choice == '2':
-                self.check_subtype_interactive()
-            elif choice == '3':
-                self.get_symptoms_interactive()
-            elif choice == '4':
-                self.get_treatment_interactive()
-            elif choice == '5':
-                self.get_diseases_by_category_interactive()
-            elif choice == '6':
-                self.get_concept_info_interactive()
-            elif choice == '7':
-                self.show_summary()
-            elif choice == '8':
-                self.list_diseases()
-            elif choice == '9':
-                self.list_symptoms()
-            else:
-                print("\nОшибка: неверный выбор! Попробуйте снова.")
             
-            input("\nНажмите Enter для продолжения...")
+            # Ждать Enter только после выполненной операции; при ошибке ввода
+            # сразу снова показывается меню
+            if self._actions.get(choice, self.invalid_choice)():
+                input("\nНажмите Enter для продолжения...")
 
 
 def main():
@@ -3,8 +3,27 @@
 Представляет знания в виде графа с узлами (концептами) и связями (отношениями)
 """
 
-from typing import Dict, List, Set, Tuple, Any
+from array import array
+from collections import deque
+from typing import Dict, List, Set, Tuple, Any, Optional, Iterable
 import json
+import sys
+
+try:
+    # Необязательная зависимость: быстрая (написанная на C) сериализация JSON
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Типы отношений (интернированы: сравнение с ними сводится к сравнению указателей)
+REL_SUBTYPE = sys.intern("является_подтипом")
+REL_HAS_SYMPTOM = sys.intern("имеет_симптом")
+REL_TREATED_BY = sys.intern("лечится")
+
+# Общий пустой словарь для поиска во вложенных индексах (только для чтения,
+# наружу не возвращается)
+_EMPTY_MAP: Dict = {}
 
 
 class SemanticNetwork:
@@ -16,8 +35,41 @@ class SemanticNetwork:
         """Инициализация пустой семантической сети"""
         # Словарь узлов: {имя_узла: {атрибуты}}
         self.nodes: Dict[str, Dict[str, Any]] = {}
-        # Список связей: [(узел1, отношение, узел2)]
-        self.relations: List[Tuple[str, str, str]] = []
+        # Связи хранятся по столбцам: i-я связь - (_src[i], _rel[i], _dst[i]).
+        # Список кортежей доступен через свойство relations
+        self._src: List[str] = []
+        self._rel: List[str] = []
+        self._dst: List[str] = []
+        self._relations_list: Tuple[Tuple[str, str, str], ...] = ()
+        self._relations_version = None
+        # Счетчик изменений сети (используется для сброса кэшей)
+        self.version = 0
+        # Целочисленные идентификаторы узлов: {имя: id} и [имя по id]
+        self._node_ids: Dict[str, int] = {}
+        self._node_names: List[str] = []
+        # Количество связей каждого типа: {отношение: число связей}
+        self._relation_type_counts: Dict[str, int] = {}
+        # Индексы связей: исходящие {узел: [связи]}, входящие {узел: [связи]}
+        # и по типу {отношение: [связи]}
+        self._out_index: Dict[str, List[Tuple[str, str, str]]] = {}
+        self._in_index: Dict[str, List[Tuple[str, str, str]]] = {}
+        self._by_type_index: Dict[str, List[Tuple[str, str, str]]] = {}
+        # Индекс смежности по типу отношения: {отношение: {источник: [цели]}}
+        self._out_by_pred: Dict[str, Dict[str, List[str]]] = {}
+        # Обратный индекс: {отношение: {цель: [источники]}}
+        self._in_by_pred: Dict[str, Dict[str, List[str]]] = {}
+        # Узлы, сгруппированные по типам: {тип: [узлы в порядке добавления]}
+        self._nodes_by_type: Dict[str, List[str]] = {}
+        # Кэш CSR-представления исходящих связей (см. _get_csr)
+        self._csr = None
+        self._csr_version = None
+        # Кэш отсортированных списков узлов по типам: {тип: [узлы]}
+        self._sorted_by_type: Dict[str, Tuple[str, ...]] = {}
+        self._sorted_by_type_version = None
+        # Неизменяемые копии списков индексов, которые возвращаются наружу:
+        # {ключ: кортеж}; создаются при первом запросе после изменения сети
+        self._frozen_views: Dict[Tuple, Tuple] = {}
+        self._frozen_version = None
         
     def add_node(self, node_name: str, node_type: str = "concept", **attributes):
         """
@@ -28,10 +80,24 @@ class SemanticNetwork:
             node_type: Тип узла (concept, symptom, disease, etc.)
             **attributes: Дополнительные атрибуты узла
         """
+        # Интернирование имени и типа ускоряет сравнения и поиск по словарям
+        node_name = sys.intern(node_name)
+        node_type = sys.intern(node_type)
+        if node_name not in self._node_ids:
+            self._node_ids[node_name] = len(self._node_names)
+            self._node_names.append(node_name)
+            self._nodes_by_type.setdefault(node_type, []).append(node_name)
+            old_type = node_type
+        else:
+            old_type = self.nodes[node_name].get("type")
         self.nodes[node_name] = {
             "type": node_type,
             **attributes
         }
+        if old_type != node_type:
+            # Тип существующего узла изменился - перестроить группировку
+            self._rebuild_nodes_by_type()
+        self.version += 1
         
     def add_relation(self, source: str, relation: str, target: str):
         """
@@ -46,24 +112,211 @@ class SemanticNetwork:
             raise ValueError(f"Узел '{source}' не существует")
         if target not in self.nodes:
             raise ValueError(f"Узел '{target}' не существует")
-            
-        self.relations.append((source, relation, target))
+        
+        rel = (sys.intern(source), sys.intern(relation), sys.intern(target))
+        self._append_columns(rel)
+        self._index_relation(rel)
+        self.version += 1
+    
+    def _append_columns(self, rel: Tuple[str, str, str]):
+        """Добавить связь в столбцы источников, отношений и целей"""
+        source, relation, target = rel
+        self._src.append(source)
+        self._rel.append(relation)
+        self._dst.append(target)
+    
+    @property
+    def relations(self) -> Tuple[Tuple[str, str, str], ...]:
+        """
+        Связи сети ((узел1, отношение, узел2), ...)
+        
+        Собираются из столбцов при первом обращении после изменения сети.
+        Кортеж неизменяем - для добавления связей есть add_relation.
+        """
+        if self._relations_version != self.version:
+            self._relations_list = tuple(zip(self._src, self._rel, self._dst))
+            self._relations_version = self.version
+        return self._relations_list
+    
+    def relation_count(self) -> int:
+        """Количество связей (без сборки списка кортежей)"""
+        return len(self._rel)
+    
+    def _index_relation(self, rel: Tuple[str, str, str]):
+        """Добавить связь во все индексы сети"""
+        source, relation, target = rel
+        self._relation_type_counts[relation] = self._relation_type_counts.get(relation, 0) + 1
+        self._out_index.setdefault(source, []).append(rel)
+        self._in_index.setdefault(target, []).append(rel)
+        self._by_type_index.setdefault(relation, []).append(rel)
+        self._out_by_pred.setdefault(relation, {}).setdefault(source, []).append(target)
+        self._in_by_pred.setdefault(relation, {}).setdefault(target, []).append(source)
+        
+    def add_nodes_bulk(self, entries: Iterable[Tuple[str, str, Dict[str, Any]]]):
+        """
+        Добавить несколько узлов за один вызов
+        
+        Индексы обновляются в том же цикле, счетчик изменений - один раз.
+        
+        Args:
+            entries: Кортежи (имя_узла, тип_узла, атрибуты)
+        """
+        retyped = False
+        for node_name, node_type, attributes in entries:
+            node_name = sys.intern(node_name)
+            node_type = sys.intern(node_type)
+            if node_name not in self._node_ids:
+                self._node_ids[node_name] = len(self._node_names)
+                self._node_names.append(node_name)
+                self._nodes_by_type.setdefault(node_type, []).append(node_name)
+            elif self.nodes[node_name].get("type") != node_type:
+                retyped = True
+            self.nodes[node_name] = {
+                "type": node_type,
+                **attributes
+            }
+        if retyped:
+            self._rebuild_nodes_by_type()
+        self.version += 1
+        
+    def add_relations_bulk(self, triples: Iterable[Tuple[str, str, str]]):
+        """
+        Добавить несколько связей за один вызов
+        
+        Сначала проверяются все узлы; если какого-то узла нет, ни одна связь
+        не добавляется.
+        
+        Args:
+            triples: Кортежи (исходный_узел, отношение, целевой_узел)
+        """
+        rels = [(sys.intern(source), sys.intern(relation), sys.intern(target))
+                for source, relation, target in triples]
+        nodes = self.nodes
+        for source, _, target in rels:
+            if source not in nodes:
+                raise ValueError(f"Узел '{source}' не существует")
+            if target not in nodes:
+                raise ValueError(f"Узел '{target}' не существует")
+        
+        for rel in rels:
+            self._append_columns(rel)
+            self._index_relation(rel)
+        self.version += 1
         
     def get_node(self, node_name: str) -> Dict[str, Any]:
         """Получить узел по имени"""
         return self.nodes.get(node_name, {})
     
-    def get_relations_from(self, node_name: str) -> List[Tuple[str, str, str]]:
-        """Получить все связи, исходящие из узла"""
-        return [r for r in self.relations if r[0] == node_name]
+    def get_node_id(self, node_name: str) -> Optional[int]:
+        """Получить целочисленный идентификатор узла (None, если узла нет)"""
+        return self._node_ids.get(node_name)
+    
+    def get_node_name(self, node_id: int) -> str:
+        """Получить имя узла по его идентификатору"""
+        return self._node_names[node_id]
+    
+    def node_count(self) -> int:
+        """Количество узлов (идентификаторы узлов лежат в диапазоне [0, node_count))"""
+        return len(self._node_names)
     
-    def get_relations_to(self, node_name: str) -> List[Tuple[str, str, str]]:
-        """Получить все связи, входящие в узел"""
-        return [r for r in self.relations if r[2] == node_name]
+    def _frozen(self, key: Tuple, items: Optional[List]) -> Tuple:
+        """
+        Получить неизменяемую копию списка из индекса
+        
+        Копия создается один раз и переиспользуется, пока сеть не изменится,
+        поэтому повторные запросы ничего не выделяют, а вызывающий код не может
+        испортить индексы, изменив результат.
+        
+        Args:
+            key: Ключ копии (вид индекса и ключи в нем)
+            items: Список из индекса (None, если ключа в индексе нет)
+            
+        Returns:
+            Кортеж с элементами списка (пустой кортеж, если списка нет)
+        """
+        if items is None:
+            return ()
+        if self._frozen_version != self.version:
+            self._frozen_views = {}
+            self._frozen_version = self.version
+        view = self._frozen_views.get(key)
+        if view is None:
+            view = self._frozen_views[key] = tuple(items)
+        return view
+    
+    def get_relations_from(self, node_name: str) -> Tuple[Tuple[str, str, str], ...]:
+        """Получить все связи, исходящие из узла (возвращает неизменяемый кортеж)"""
+        return self._frozen(("from", node_name), self._out_index.get(node_name))
+    
+    def get_relations_to(self, node_name: str) -> Tuple[Tuple[str, str, str], ...]:
+        """Получить все связи, входящие в узел (возвращает неизменяемый кортеж)"""
+        return self._frozen(("to", node_name), self._in_index.get(node_name))
+    
+    def get_relations_by_type(self, relation_type: str) -> Tuple[Tuple[str, str, str], ...]:
+        """Получить все связи определенного типа (возвращает неизменяемый кортеж)"""
+        return self._frozen(("type", relation_type), self._by_type_index.get(relation_type))
+    
+    def get_targets(self, node_name: str, relation_type: str) -> Tuple[str, ...]:
+        """
+        Получить узлы, в которые ведут связи заданного типа из узла
+        
+        Использует индекс смежности вместо просмотра всего списка связей.
+        
+        Args:
+            node_name: Исходный узел
+            relation_type: Тип отношения
+            
+        Returns:
+            Неизменяемый кортеж целевых узлов в порядке добавления связей
+        """
+        return self._frozen(("targets", relation_type, node_name),
+                            self._out_by_pred.get(relation_type, _EMPTY_MAP).get(node_name))
+    
+    def get_sources(self, node_name: str, relation_type: str) -> Tuple[str, ...]:
+        """
+        Получить узлы, из которых в узел ведут связи заданного типа
+        
+        Args:
+            node_name: Целевой узел
+            relation_type: Тип отношения
+            
+        Returns:
+            Неизменяемый кортеж исходных узлов в порядке добавления связей
+        """
+        return self._frozen(("sources", relation_type, node_name),
+                            self._in_by_pred.get(relation_type, _EMPTY_MAP).get(node_name))
+    
+    def descendants(self, node_name: str, relation_type: str) -> Set[str]:
+        """
+        Найти все узлы, из которых данный узел достижим по связям заданного типа
+        
+        Выполняет один обратный поиск в ширину по входящим связям, например
+        все подтипы категории для отношения "является_подтипом".
+        
+        Args:
+            node_name: Начальный узел
+            relation_type: Тип отношения
+            
+        Returns:
+            Множество узлов-потомков (без самого узла)
+        """
+        incoming = self._in_by_pred.get(relation_type, {})
+        visited: Set[str] = set()
+        queue = deque((node_name,))
+        
+        while queue:
+            current = queue.popleft()
+            for source in incoming.get(current, ()):
+                if source not in visited:
+                    visited.add(source)
+                    queue.append(source)
+        
+        visited.discard(node_name)
+        return visited
     
-    def get_relations_by_type(self, relation_type: str) -> List[Tuple[str, str, str]]:
-        """Получить все связи определенного типа"""
-        return [r for r in self.relations if r[1] == relation_type]
+    def get_relation_type_counts(self) -> Dict[str, int]:
+        """Получить количество связей каждого типа (поддерживается при добавлении)"""
+        return self._relation_type_counts
     
     def find_path(self, start: str, end: str, max_depth: int = 5) -> List[List[Tuple[str, str, str]]]:
         """
@@ -75,62 +328,244 @@ class SemanticNetwork:
             max_depth: Максимальная глубина поиска
             
         Returns:
-            Список путей, где каждый путь - список связей
+            Список путей, где каждый путь - список связей.
+            Пути нулевой длины не возвращаются: при start == end
+            находятся только циклы, возвращающиеся в start.
         """
         paths = []
-        visited = set()
+        # Быстрый выход без поиска: из start не выходит ни одной связи
+        # или в end не входит ни одной (в том числе если узлов нет в сети)
+        if max_depth < 1 or not self._out_index.get(start) or not self._in_index.get(end):
+            return paths
         
-        def dfs(current: str, path: List[Tuple[str, str, str]], depth: int):
-            if depth > max_depth:
-                return
+        ids, indptr, indices, edges = self._get_csr()
+        start_id = ids[start]
+        end_id = ids[end]
+        
+        # Итеративный поиск в глубину по целочисленным id узлов.
+        # Для узла на глубине d: pos[d] - следующая непросмотренная связь
+        # в indices, stops[d] - конец его связей; path - номера связей пути.
+        # Посещенные узлы - узлы текущего пути (не больше max_depth + 1).
+        # Для небольшой глубины линейный поиск в коротком списке быстрее
+        # хеширования; для большой глубины используется множество.
+        if max_depth > 16:
+            visited = {start_id}
+            mark, unmark = visited.add, visited.discard
+        else:
+            visited = [start_id]
+            mark, unmark = visited.append, visited.remove
+        path: List[int] = []
+        pos = [indptr[start_id]]
+        stops = [indptr[start_id + 1]]
+        
+        while pos:
+            i = pos[-1]
             
-            if current == end and path:
-                paths.append(path.copy())
-                return
+            if i == stops[-1]:
+                # Связи узла исчерпаны - вернуться на уровень выше
+                pos.pop()
+                stops.pop()
+                if path:
+                    unmark(indices[path.pop()])
+                continue
+            
+            pos[-1] = i + 1
+            target = indices[i]
+            if target == end_id:
+                # Путь найден; дальше конечного узла не идем.
+                # Кортежи связей собираются только здесь, по номерам связей пути
+                found = list(map(edges.__getitem__, path))
+                found.append(edges[i])
+                paths.append(found)
+            elif len(pos) < max_depth and target not in visited:
+                # Спускаемся, только если из узла еще можно дойти до end
+                # не длиннее max_depth связей
+                mark(target)
+                path.append(i)
+                pos.append(indptr[target])
+                stops.append(indptr[target + 1])
+        
+        return paths
+    
+    def all_paths_bulk(self, start: str, ends: Iterable[str],
+                       max_depth: int = 5) -> Dict[str, List[List[Tuple[str, str, str]]]]:
+        """
+        Найти все пути от одного узла сразу до нескольких узлов
+        
+        Выполняет один обход в глубину вместо отдельного вызова find_path
+        для каждого конечного узла.
+        
+        Args:
+            start: Начальный узел
+            ends: Конечные узлы
+            max_depth: Максимальная глубина поиска
             
-            if current in visited:
-                return
-                
-            visited.add(current)
+        Returns:
+            Словарь {конечный узел: список путей} с ключом для каждого узла
+            из ends; пути те же, что возвращает find_path(start, end, max_depth)
+        """
+        results = {end: [] for end in ends}
+        if max_depth < 1 or not self._out_index.get(start):
+            return results
+        
+        ids, indptr, indices, edges = self._get_csr()
+        # Узлы без входящих связей недостижимы - в обходе не участвуют
+        targets = {ids[end]: paths for end, paths in results.items()
+                   if self._in_index.get(end)}
+        if not targets:
+            return results
+        
+        start_id = ids[start]
+        if max_depth > 16:
+            visited = {start_id}
+            mark, unmark = visited.add, visited.discard
+        else:
+            visited = [start_id]
+            mark, unmark = visited.append, visited.remove
+        path: List[int] = []
+        pos = [indptr[start_id]]
+        stops = [indptr[start_id + 1]]
+        
+        # Тот же обход, что в find_path, но найденный путь не останавливает
+        # спуск: через один конечный узел можно дойти до другого
+        while pos:
+            i = pos[-1]
             
-            for relation in self.get_relations_from(current):
-                _, rel_type, target = relation
-                path.append(relation)
-                dfs(target, path, depth + 1)
-                path.pop()
+            if i == stops[-1]:
+                pos.pop()
+                stops.pop()
+                if path:
+                    unmark(indices[path.pop()])
+                continue
             
-            visited.remove(current)
+            pos[-1] = i + 1
+            target = indices[i]
+            paths = targets.get(target)
+            # Конечный узел, уже лежащий на пути, повторно не засчитывается:
+            # find_path не проходит через end (кроме циклов в start)
+            if paths is not None and (target == start_id or target not in visited):
+                found = list(map(edges.__getitem__, path))
+                found.append(edges[i])
+                paths.append(found)
+            if len(pos) < max_depth and target not in visited:
+                mark(target)
+                path.append(i)
+                pos.append(indptr[target])
+                stops.append(indptr[target + 1])
         
-        dfs(start, [], 0)
-        return paths
+        return results
+    
+    def _get_csr(self) -> Tuple[Dict[str, int], array, array, List[Tuple[str, str, str]]]:
+        """
+        Получить CSR-представление исходящих связей (строится один раз на версию сети)
+        
+        Returns:
+            Кортеж (ids, indptr, indices, edges): ids - id узлов; связи узла с id v
+            занимают позиции indptr[v]:indptr[v + 1], indices[k] - id цели
+            связи k, edges[k] - сама связь
+        """
+        if self._csr_version != self.version:
+            # Узлы, которые встречаются только в связях (например, после
+            # импорта неполных данных), получают id после узлов сети
+            ids = dict(self._node_ids)
+            names = list(self._node_names)
+            for source, target in zip(self._src, self._dst):
+                for name in (source, target):
+                    if name not in ids:
+                        ids[name] = len(names)
+                        names.append(name)
+            
+            indptr = array('I', [0])
+            indices = array('I')
+            edges = []
+            for name in names:
+                for rel in self._out_index.get(name, ()):
+                    indices.append(ids[rel[2]])
+                    edges.append(rel)
+                indptr.append(len(edges))
+            
+            self._csr = (ids, indptr, indices, edges)
+            self._csr_version = self.version
+        return self._csr
+    
+    def _rebuild_nodes_by_type(self):
+        """Перестроить группировку узлов по типам"""
+        self._nodes_by_type = {}
+        for name, attrs in self.nodes.items():
+            self._nodes_by_type.setdefault(attrs.get("type"), []).append(name)
+    
+    def get_all_nodes_by_type(self, node_type: str) -> Tuple[str, ...]:
+        """
+        Получить все узлы определенного типа в порядке добавления
+        
+        Возвращает неизменяемый кортеж.
+        """
+        return self._frozen(("nodes", node_type), self._nodes_by_type.get(node_type))
     
-    def get_all_nodes_by_type(self, node_type: str) -> List[str]:
-        """Получить все узлы определенного типа"""
-        return [name for name, attrs in self.nodes.items() 
-                if attrs.get("type") == node_type]
+    def get_node_type_counts(self) -> Dict[str, int]:
+        """Получить количество узлов каждого типа (по группировке узлов)"""
+        return {node_type: len(names) for node_type, names in self._nodes_by_type.items()}
+    
+    def get_sorted_nodes_by_type(self, node_type: str) -> Tuple[str, ...]:
+        """
+        Получить отсортированные узлы определенного типа
+        
+        Узлы сортируются один раз и переиспользуются, пока сеть не изменится,
+        поэтому метод возвращает неизменяемый кортеж.
+        """
+        if self._sorted_by_type_version != self.version:
+            self._sorted_by_type = {t: tuple(sorted(names)) for t, names in self._nodes_by_type.items()}
+            self._sorted_by_type_version = self.version
+        return self._sorted_by_type.get(node_type, ())
     
     def export_to_dict(self) -> Dict:
         """Экспортировать сеть в словарь"""
         return {
             "nodes": self.nodes,
-            "relations": self.relations
+            "relations": list(self.relations)
         }
     
     def import_from_dict(self, data: Dict):
         """Импортировать сеть из словаря"""
-        self.nodes = data.get("nodes", {})
-        self.relations = [tuple(r) for r in data.get("relations", [])]
+        self.nodes = {sys.intern(name): attrs for name, attrs in data.get("nodes", {}).items()}
+        self._node_names = list(self.nodes)
+        self._node_ids = {name: i for i, name in enumerate(self._node_names)}
+        self._rebuild_nodes_by_type()
+        rels = [tuple(sys.intern(part) for part in r)
+                for r in data.get("relations", [])]
+        self._src = []
+        self._rel = []
+        self._dst = []
+        self._relation_type_counts = {}
+        self._out_index = {}
+        self._in_index = {}
+        self._by_type_index = {}
+        self._out_by_pred = {}
+        self._in_by_pred = {}
+        for rel in rels:
+            self._append_columns(rel)
+            self._index_relation(rel)
+        self.version += 1
     
     def save_to_file(self, filename: str):
-        """Сохранить сеть в JSON файл"""
+        """Сохранить сеть в JSON файл (через orjson, если он установлен)"""
+        if orjson is not None:
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(self.export_to_dict(), option=orjson.OPT_INDENT_2))
+            return
+        
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(self.export_to_dict(), f, ensure_ascii=False, indent=2)
     
     def load_from_file(self, filename: str):
-        """Загрузить сеть из JSON файла"""
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            self.import_from_dict(data)
+        """Загрузить сеть из JSON файла (через orjson, если он установлен)"""
+        if orjson is not None:
+            with open(filename, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        self.import_from_dict(data)
 
 
 def create_medical_knowledge_base() -> SemanticNetwork:
@@ -140,123 +575,127 @@ def create_medical_knowledge_base() -> SemanticNetwork:
     """
     kb = SemanticNetwork()
     
-    # Добавляем категории заболеваний
-    kb.add_node("Заболевание", node_type="category", 
-                description="Корневая категория заболеваний")
-    kb.add_node("Инфекционное_заболевание", node_type="category",
-                description="Заболевания, вызванные инфекцией")
-    kb.add_node("Респираторное_заболевание", node_type="category",
-                description="Заболевания дыхательной системы")
-    kb.add_node("Желудочно-кишечное_заболевание", node_type="category",
-                description="Заболевания ЖКТ")
-    
-    # Связи между категориями (иерархия)
-    kb.add_relation("Инфекционное_заболевание", "является_подтипом", "Заболевание")
-    kb.add_relation("Респираторное_заболевание", "является_подтипом", "Заболевание")
-    kb.add_relation("Желудочно-кишечное_заболевание", "является_подтипом", "Заболевание")
-    
-    # Конкретные заболевания
-    kb.add_node("Грипп", node_type="disease", 
-                severity="средняя", contagious=True,
-                description="Острое инфекционное заболевание дыхательных путей")
-    kb.add_node("ОРВИ", node_type="disease",
-                severity="легкая", contagious=True,
-                description="Острая респираторная вирусная инфекция")
-    kb.add_node("Пневмония", node_type="disease",
-                severity="высокая", contagious=False,
-                description="Воспаление легких")
-    kb.add_node("Гастрит", node_type="disease",
-                severity="средняя", contagious=False,
-                description="Воспаление слизистой оболочки желудка")
-    kb.add_node("Пищевое_отравление", node_type="disease",
-                severity="средняя", contagious=False,
-                description="Острое расстройство пищеварения")
-    
-    # Связи заболеваний с категориями
-    kb.add_relation("Грипп", "является_подтипом", "Инфекционное_заболевание")
-    kb.add_relation("Грипп", "является_подтипом", "Респираторное_заболевание")
-    kb.add_relation("ОРВИ", "является_подтипом", "Инфекционное_заболевание")
-    kb.add_relation("ОРВИ", "является_подтипом", "Респираторное_заболевание")
-    kb.add_relation("Пневмония", "является_подтипом", "Респираторное_заболевание")
-    kb.add_relation("Гастрит", "является_подтипом", "Желудочно-кишечное_заболевание")
-    kb.add_relation("Пищевое_отравление", "является_подтипом", "Желудочно-кишечное_заболевание")
-    
-    # Симптомы
-    kb.add_node("Высокая_температура", node_type="symptom",
-                description="Температура тела выше 38°C")
-    kb.add_node("Кашель", node_type="symptom",
-                description="Рефлекторное действие для очистки дыхательных путей")
-    kb.add_node("Насморк", node_type="symptom",
-                description="Выделения из носа")
-    kb.add_node("Боль_в_горле", node_type="symptom",
-                description="Дискомфорт в области горла")
-    kb.add_node("Головная_боль", node_type="symptom",
-                description="Боль в области головы")
-    kb.add_node("Слабость", node_type="symptom",
-                description="Общее недомогание и усталость")
-    kb.add_node("Боль_в_груди", node_type="symptom",
-                description="Боль в области грудной клетки")
-    kb.add_node("Одышка", node_type="symptom",
-                description="Затрудненное дыхание")
-    kb.add_node("Тошнота", node_type="symptom",
-                description="Позывы к рвоте")
-    kb.add_node("Рвота", node_type="symptom",
-                description="Извержение содержимого желудка")
-    kb.add_node("Боль_в_животе", node_type="symptom",
-                description="Боль в области живота")
-    kb.add_node("Диарея", node_type="symptom",
-                description="Жидкий стул")
-    
-    # Связи заболеваний с симптомами
-    kb.add_relation("Грипп", "имеет_симптом", "Высокая_температура")
-    kb.add_relation("Грипп", "имеет_симптом", "Кашель")
-    kb.add_relation("Грипп", "имеет_симптом", "Головная_боль")
-    kb.add_relation("Грипп", "имеет_симптом", "Слабость")
-    kb.add_relation("Грипп", "имеет_симптом", "Боль_в_горле")
-    
-    kb.add_relation("ОРВИ", "имеет_симптом", "Насморк")
-    kb.add_relation("ОРВИ", "имеет_симптом", "Кашель")
-    kb.add_relation("ОРВИ", "имеет_симптом", "Боль_в_горле")
-    kb.add_relation("ОРВИ", "имеет_симптом", "Слабость")
-    
-    kb.add_relation("Пневмония", "имеет_симптом", "Высокая_температура")
-    kb.add_relation("Пневмония", "имеет_симптом", "Кашель")
-    kb.add_relation("Пневмония", "имеет_симптом", "Боль_в_груди")
-    kb.add_relation("Пневмония", "имеет_симптом", "Одышка")
-    kb.add_relation("Пневмония", "имеет_симптом", "Слабость")
-    
-    kb.add_relation("Гастрит", "имеет_симптом", "Боль_в_животе")
-    kb.add_relation("Гастрит", "имеет_симптом", "Тошнота")
-    
-    kb.add_relation("Пищевое_отравление", "имеет_симптом", "Тошнота")
-    kb.add_relation("Пищевое_отравление", "имеет_симптом", "Рвота")
-    kb.add_relation("Пищевое_отравление", "имеет_симптом", "Диарея")
-    kb.add_relation("Пищевое_отравление", "имеет_симптом", "Боль_в_животе")
-    
-    # Методы лечения
-    kb.add_node("Противовирусные", node_type="treatment",
-                description="Препараты против вирусов")
-    kb.add_node("Антибиотики", node_type="treatment",
-                description="Препараты против бактерий")
-    kb.add_node("Жаропонижающие", node_type="treatment",
-                description="Препараты для снижения температуры")
-    kb.add_node("Сорбенты", node_type="treatment",
-                description="Препараты для выведения токсинов")
-    kb.add_node("Постельный_режим", node_type="treatment",
-                description="Покой и отдых")
-    
-    # Связи заболеваний с лечением
-    kb.add_relation("Грипп", "лечится", "Противовирусные")
-    kb.add_relation("Грипп", "лечится", "Жаропонижающие")
-    kb.add_relation("Грипп", "лечится", "Постельный_режим")
-    
-    kb.add_relation("ОРВИ", "лечится", "Постельный_режим")
-    kb.add_relation("ОРВИ", "лечится", "Жаропонижающие")
-    
-    kb.add_relation("Пневмония", "лечится", "Антибиотики")
-    kb.add_relation("Пневмония", "лечится", "Постельный_режим")
-    
-    kb.add_relation("Пищевое_отравление", "лечится", "Сорбенты")
+    kb.add_nodes_bulk([
+        # Категории заболеваний
+        ("Заболевание", "category",
+         {"description": "Корневая категория заболеваний"}),
+        ("Инфекционное_заболевание", "category",
+         {"description": "Заболевания, вызванные инфекцией"}),
+        ("Респираторное_заболевание", "category",
+         {"description": "Заболевания дыхательной системы"}),
+        ("Желудочно-кишечное_заболевание", "category",
+         {"description": "Заболевания ЖКТ"}),
+        
+        # Конкретные заболевания
+        ("Грипп", "disease",
+         {"severity": "средняя", "contagious": True,
+          "description": "Острое инфекционное заболевание дыхательных путей"}),
+        ("ОРВИ", "disease",
+         {"severity": "легкая", "contagious": True,
+          "description": "Острая респираторная вирусная инфекция"}),
+        ("Пневмония", "disease",
+         {"severity": "высокая", "contagious": False,
+          "description": "Воспаление легких"}),
+        ("Гастрит", "disease",
+         {"severity": "средняя", "contagious": False,
+          "description": "Воспаление слизистой оболочки желудка"}),
+        ("Пищевое_отравление", "disease",
+         {"severity": "средняя", "contagious": False,
+          "description": "Острое расстройство пищеварения"}),
+        
+        # Симптомы
+        ("Высокая_температура", "symptom",
+         {"description": "Температура тела выше 38°C"}),
+        ("Кашель", "symptom",
+         {"description": "Рефлекторное действие для очистки дыхательных путей"}),
+        ("Насморк", "symptom",
+         {"description": "Выделения из носа"}),
+        ("Боль_в_горле", "symptom",
+         {"description": "Дискомфорт в области горла"}),
+        ("Головная_боль", "symptom",
+         {"description": "Боль в области головы"}),
+        ("Слабость", "symptom",
+         {"description": "Общее недомогание и усталость"}),
+        ("Боль_в_груди", "symptom",
+         {"description": "Боль в области грудной клетки"}),
+        ("Одышка", "symptom",
+         {"description": "Затрудненное дыхание"}),
+        ("Тошнота", "symptom",
+         {"description": "Позывы к рвоте"}),
+        ("Рвота", "symptom",
+         {"description": "Извержение содержимого желудка"}),
+        ("Боль_в_животе", "symptom",
+         {"description": "Боль в области живота"}),
+        ("Диарея", "symptom",
+         {"description": "Жидкий стул"}),
+        
+        # Методы лечения
+        ("Противовирусные", "treatment",
+         {"description": "Препараты против вирусов"}),
+        ("Антибиотики", "treatment",
+         {"description": "Препараты против бактерий"}),
+        ("Жаропонижающие", "treatment",
+         {"description": "Препараты для снижения температуры"}),
+        ("Сорбенты", "treatment",
+         {"description": "Препараты для выведения токсинов"}),
+        ("Постельный_режим", "treatment",
+         {"description": "Покой и отдых"}),
+    ])
+    
+    kb.add_relations_bulk([
+        # Связи между категориями (иерархия)
+        ("Инфекционное_заболевание", REL_SUBTYPE, "Заболевание"),
+        ("Респираторное_заболевание", REL_SUBTYPE, "Заболевание"),
+        ("Желудочно-кишечное_заболевание", REL_SUBTYPE, "Заболевание"),
+        
+        # Связи заболеваний с категориями
+        ("Грипп", REL_SUBTYPE, "Инфекционное_заболевание"),
+        ("Грипп", REL_SUBTYPE, "Респираторное_заболевание"),
+        ("ОРВИ", REL_SUBTYPE, "Инфекционное_заболевание"),
+        ("ОРВИ", REL_SUBTYPE, "Респираторное_заболевание"),
+        ("Пневмония", REL_SUBTYPE, "Респираторное_заболевание"),
+        ("Гастрит", REL_SUBTYPE, "Желудочно-кишечное_заболевание"),
+        ("Пищевое_отравление", REL_SUBTYPE, "Желудочно-кишечное_заболевание"),
+        
+        # Связи заболеваний с симптомами
+        ("Грипп", REL_HAS_SYMPTOM, "Высокая_температура"),
+        ("Грипп", REL_HAS_SYMPTOM, "Кашель"),
+        ("Грипп", REL_HAS_SYMPTOM, "Головная_боль"),
+        ("Грипп", REL_HAS_SYMPTOM, "Слабость"),
+        ("Грипп", REL_HAS_SYMPTOM, "Боль_в_горле"),
+        
+        ("ОРВИ", REL_HAS_SYMPTOM, "Насморк"),
+        ("ОРВИ", REL_HAS_SYMPTOM, "Кашель"),
+        ("ОРВИ", REL_HAS_SYMPTOM, "Боль_в_горле"),
+        ("ОРВИ", REL_HAS_SYMPTOM, "Слабость"),
+        
+        ("Пневмония", REL_HAS_SYMPTOM, "Высокая_температура"),
+        ("Пневмония", REL_HAS_SYMPTOM, "Кашель"),
+        ("Пневмония", REL_HAS_SYMPTOM, "Боль_в_груди"),
+        ("Пневмония", REL_HAS_SYMPTOM, "Одышка"),
+        ("Пневмония", REL_HAS_SYMPTOM, "Слабость"),
+        
+        ("Гастрит", REL_HAS_SYMPTOM, "Боль_в_животе"),
+        ("Гастрит", REL_HAS_SYMPTOM, "Тошнота"),
+        
+        ("Пищевое_отравление", REL_HAS_SYMPTOM, "Тошнота"),
+        ("Пищевое_отравление", REL_HAS_SYMPTOM, "Рвота"),
+        ("Пищевое_отравление", REL_HAS_SYMPTOM, "Диарея"),
+        ("Пищевое_отравление", REL_HAS_SYMPTOM, "Боль_в_животе"),
+        
+        # Связи заболеваний с лечением
+        ("Грипп", REL_TREATED_BY, "Противовирусные"),
+        ("Грипп", REL_TREATED_BY, "Жаропонижающие"),
+        ("Грипп", REL_TREATED_BY, "Постельный_режим"),
+        
+        ("ОРВИ", REL_TREATED_BY, "Постельный_режим"),
+        ("ОРВИ", REL_TREATED_BY, "Жаропонижающие"),
+        
+        ("Пневмония", REL_TREATED_BY, "Антибиотики"),
+        ("Пневмония", REL_TREATED_BY, "Постельный_режим"),
+        
+        ("Пищевое_отравление", REL_TREATED_BY, "Сорбенты"),
+    ])
     
     return kb
 
@@ -267,16 +706,16 @@ if __name__ == "__main__":
     
     print("=== Тест базы знаний ===")
     print(f"Всего узлов: {len(kb.nodes)}")
-    print(f"Всего связей: {len(kb.relations)}")
+    print(f"Всего связей: {kb.relation_count()}")
     
     print("\nЗаболевания:")
     for disease in kb.get_all_nodes_by_type("disease"):
         print(f"  - {disease}")
     
     print("\nСимптомы гриппа:")
-    for rel in kb.get_relations_from("Грипп"):
-        if rel[1] == "имеет_симптом":
-            print(f"  - {rel[2]}")
+    for _, relation, target in kb.get_relations_from("Грипп"):
+        if relation == REL_HAS_SYMPTOM:
+            print(f"  - {target}")
     
     # Сохранение в файл
     kb.save_to_file("knowledge_base.json")
@@ -0,0 +1,72 @@
+"""
+Тесты механизма логического вывода
+"""
+
+import unittest
+
+from inference_engine import InferenceEngine
+from semantic_network import create_medical_knowledge_base
+
+
+class SubtypeTraceTest(unittest.TestCase):
+    """Трассировка is_subtype_of перечисляет все просмотренные узлы и связи"""
+    
+    def setUp(self):
+        self.engine = InferenceEngine(create_medical_knowledge_base())
+    
+    def test_trace_lists_explored_links(self):
+        self.assertTrue(self.engine.is_subtype_of("ОРВИ", "Заболевание"))
+        
+        links = [step.details for step in self.engine.get_trace_by_step("Найдена связь")]
+        self.assertEqual(links, [
+            "ОРВИ -> является_подтипом -> Инфекционное_заболевание",
+            "ОРВИ -> является_подтипом -> Респираторное_заболевание",
+            "Инфекционное_заболевание -> является_подтипом -> Заболевание",
+            "Респираторное_заболевание -> является_подтипом -> Заболевание",
+        ])
+        visited = [step.details for step in self.engine.get_trace_by_step("Проверка узла")]
+        self.assertEqual(visited, ["ОРВИ", "Инфекционное_заболевание",
+                                   "Респираторное_заболевание", "Заболевание"])
+    
+    def test_get_subtype_links_keeps_trace(self):
+        self.engine.is_subtype_of("Грипп", "Заболевание")
+        trace = list(self.engine.get_trace())
+        links = [step.details for step in self.engine.get_trace_by_step("Найдена связь")]
+        
+        self.assertEqual(self.engine.get_subtype_links("Грипп", "Заболевание"), links)
+        self.assertEqual(self.engine.get_trace(), trace)
+    
+    def test_not_subtype(self):
+        self.assertFalse(self.engine.is_subtype_of("Гастрит", "Респираторное_заболевание"))
+        self.assertFalse(self.engine.check_subtype("Гастрит", "Респираторное_заболевание"))
+
+
+class DescribeTest(unittest.TestCase):
+    """describe согласован с get_all_related_info и get_treatment"""
+    
+    def setUp(self):
+        self.kb = create_medical_knowledge_base()
+        self.engine = InferenceEngine(self.kb)
+    
+    def test_info_matches_get_all_related_info(self):
+        for concept in self.kb.nodes:
+            with self.subTest(concept=concept):
+                description = self.engine.describe(concept, [])
+                self.assertEqual(description.info, self.engine.get_all_related_info(concept))
+    
+    def test_treatments_match_get_treatment(self):
+        for disease in self.kb.get_all_nodes_by_type("disease"):
+            with self.subTest(disease=disease):
+                description = self.engine.describe(disease, [])
+                self.assertEqual(description.treatments, self.engine.get_treatment(disease))
+    
+    def test_unknown_concept(self):
+        description = self.engine.describe("Неизвестный_концепт", ["Заболевание"])
+        
+        self.assertEqual(description.info, self.engine.get_all_related_info("Неизвестный_концепт"))
+        self.assertEqual(description.subtype_checks, {"Заболевание": False})
+        self.assertEqual(description.treatments, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Тесты дискового кэша раскладок графа
+"""
+
+import os
+import tempfile
+import unittest
+
+from layout_cache import cached_layout, layout_fingerprint
+
+
+NODES = ["Грипп", "Кашель", "Температура"]
+EDGES = [("Грипп", "Кашель"), ("Грипп", "Температура")]
+LAYOUT = {"Грипп": (0.0, 1.0), "Кашель": (-1.0, 0.0), "Температура": (1.0, 0.0)}
+
+
+class LayoutCacheTest(unittest.TestCase):
+    """Попадание в кэш, промах и поврежденный файл кэша"""
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = self._tmp.name
+        self.calls = 0
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    def compute(self):
+        self.calls += 1
+        return dict(LAYOUT)
+    
+    def cache_path(self, kind: str) -> str:
+        return os.path.join(self.cache_dir,
+                            f"layout_{layout_fingerprint(kind, NODES, EDGES)}.json")
+    
+    def test_miss_computes_and_stores(self):
+        pos = cached_layout("spring", NODES, EDGES, self.compute, self.cache_dir)
+        
+        self.assertEqual(pos, LAYOUT)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(os.path.exists(self.cache_path("spring")))
+    
+    def test_hit_does_not_recompute(self):
+        cached_layout("spring", NODES, EDGES, self.compute, self.cache_dir)
+        pos = cached_layout("spring", NODES, EDGES, self.compute, self.cache_dir)
+        
+        self.assertEqual(pos, LAYOUT)
+        self.assertEqual(self.calls, 1)
+    
+    def test_kind_is_part_of_key(self):
+        cached_layout("hierarchy:dot", NODES, EDGES, self.compute, self.cache_dir)
+        cached_layout("hierarchy:spring", NODES, EDGES, self.compute, self.cache_dir)
+        
+        self.assertEqual(self.calls, 2)
+    
+    def test_changed_graph_is_a_miss(self):
+        cached_layout("spring", NODES, EDGES, self.compute, self.cache_dir)
+        cached_layout("spring", NODES, EDGES[:1], self.compute, self.cache_dir)
+        
+        self.assertEqual(self.calls, 2)
+    
+    def test_failed_compute_stores_nothing(self):
+        def fail():
+            raise ImportError("graphviz не установлен")
+        
+        with self.assertRaises(ImportError):
+            cached_layout("hierarchy:dot", NODES, EDGES, fail, self.cache_dir)
+        self.assertFalse(os.path.exists(self.cache_path("hierarchy:dot")))
+    
+    def test_corrupt_file_is_recomputed(self):
+        path = self.cache_path("spring")
+        for content in (b"\x80\x04not json", b'{"truncated": ', b"[1, 2, 3]",
+                        '{"Грипп": [0, 1]}'.encode("utf-8"),
+                        '{"Грипп": "xy", "Кашель": [0, 0], "Температура": [1, 0]}'.encode("utf-8")):
+            with self.subTest(content=content):
+                with open(path, 'wb') as f:
+                    f.write(content)
+                calls_before = self.calls
+                
+                pos = cached_layout("spring", NODES, EDGES, self.compute, self.cache_dir)
+                
+                self.assertEqual(pos, LAYOUT)
+                self.assertEqual(self.calls, calls_before + 1)
+                # Поврежденный файл заменен корректной раскладкой
+                self.assertEqual(
+                    cached_layout("spring", NODES, EDGES, self.compute, self.cache_dir), LAYOUT)
+                self.assertEqual(self.calls, calls_before + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,11 +3,16 @@
 Создает графическое представление базы знаний
 """
 
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch, FancyArrowPatch
+from matplotlib.collections import LineCollection
 import networkx as nx
-from semantic_network import SemanticNetwork, create_medical_knowledge_base
+from typing import Callable, Dict, List, Optional, Tuple
+from semantic_network import (SemanticNetwork, create_medical_knowledge_base,
+                              REL_SUBTYPE, REL_HAS_SYMPTOM, REL_TREATED_BY)
+from layout_cache import LAYOUT_CACHE_DIR, cached_layout
 
 
 class NetworkVisualizer:
@@ -35,19 +40,27 @@ class NetworkVisualizer:
         
         # Цвета для разных типов связей
         self.edge_colors = {
-            "является_подтипом": "#2C3E50",    # Темно-синий
-            "имеет_симптом": "#E74C3C",        # Красный
-            "лечится": "#27AE60",              # Зеленый
+            REL_SUBTYPE: "#2C3E50",            # Темно-синий
+            REL_HAS_SYMPTOM: "#E74C3C",        # Красный
+            REL_TREATED_BY: "#27AE60",         # Зеленый
             "default": "#7F8C8D"               # Серый
         }
         
         # Стили для разных типов связей
         self.edge_styles = {
-            "является_подтипом": "solid",
-            "имеет_симптом": "dashed",
-            "лечится": "dotted",
+            REL_SUBTYPE: "solid",
+            REL_HAS_SYMPTOM: "dashed",
+            REL_TREATED_BY: "dotted",
             "default": "solid"
         }
+        
+        # Кэш графа NetworkX (перестраивается, если база знаний изменилась)
+        self._graph: Optional[nx.DiGraph] = None
+        self._graph_version = None
+        # Группировки, построенные вместе с графом:
+        # {тип_узла: [узлы]} и {отношение: [(u, v)]}
+        self._nodes_by_type: Dict[str, List[str]] = {}
+        self._edges_by_relation: Dict[str, List[Tuple[str, str]]] = {}
     
     def create_graph(self) -> nx.DiGraph:
         """
@@ -68,61 +81,129 @@ class NetworkVisualizer:
         
         return G
     
+    def _get_graph(self) -> nx.DiGraph:
+        """
+        Получить граф NetworkX, построив его только при первом обращении
+        или после изменения базы знаний
+        
+        Returns:
+            Направленный граф (общий для всех визуализаций, не изменять)
+        """
+        if self._graph is None or self._graph_version != self.kb.version:
+            G = self.create_graph()
+            
+            # Группировка узлов по типам и ребер по отношениям за один проход
+            nodes_by_type: Dict[str, List[str]] = {}
+            for node, data in G.nodes(data=True):
+                nodes_by_type.setdefault(data.get('type', 'concept'), []).append(node)
+            edges_by_relation: Dict[str, List[Tuple[str, str]]] = {}
+            for u, v, data in G.edges(data=True):
+                edges_by_relation.setdefault(data.get('relation', 'default'), []).append((u, v))
+            
+            self._graph = G
+            self._nodes_by_type = nodes_by_type
+            self._edges_by_relation = edges_by_relation
+            self._graph_version = self.kb.version
+        return self._graph
+    
+    def _cached_layout(self, G: nx.DiGraph, kind: str,
+                       compute: Callable[[], Dict]) -> Dict:
+        """
+        Получить раскладку графа из дискового кэша или вычислить и сохранить ее
+        
+        Ключ кэша - вид раскладки и отпечаток множества узлов и ребер графа,
+        поэтому после изменения базы знаний раскладка вычисляется заново
+        (см. layout_cache.cached_layout).
+        
+        Args:
+            G: Граф
+            kind: Вид раскладки (вместе с алгоритмом и параметрами)
+            compute: Функция, вычисляющая раскладку
+            
+        Returns:
+            Словарь {узел: (x, y)}
+        """
+        return cached_layout(kind, G.nodes, G.edges, compute, LAYOUT_CACHE_DIR)
+    
+    def invalidate_graph(self):
+        """
+        Сбросить кэшированный граф и группировки
+        (например, после изменения атрибутов узлов)
+        """
+        self._graph = None
+    
     def visualize_full_network(self, output_file: str = "semantic_network_full.png",
-                              figsize: tuple = (20, 16)):
+                              figsize: tuple = (20, 16), ax=None):
         """
         Визуализировать полную семантическую сеть
         
         Args:
             output_file: Имя файла для сохранения
             figsize: Размер фигуры
+            ax: Оси matplotlib для рисования; если заданы, отдельная фигура
+                не создается и файл не сохраняется
         """
-        G = self.create_graph()
+        G = self._get_graph()
         
-        fig, ax = plt.subplots(figsize=figsize)
+        own_figure = ax is None
+        if own_figure:
+            fig, ax = plt.subplots(figsize=figsize)
         
         # Использовать иерархический layout
-        pos = nx.spring_layout(G, k=2, iterations=50, seed=42)
+        pos = self._cached_layout(
+            G, "spring:k=2:iterations=50:seed=42",
+            lambda: nx.spring_layout(G, k=2, iterations=50, seed=42))
         
-        # Группировка узлов по типам
-        node_types = {}
-        for node in G.nodes():
-            node_type = G.nodes[node].get('type', 'concept')
-            if node_type not in node_types:
-                node_types[node_type] = []
-            node_types[node_type].append(node)
+        # Узлы, сгруппированные по типам (строятся вместе с графом)
+        node_types = self._nodes_by_type
         
-        # Отрисовка узлов по типам
+        # Все узлы рисуются одной коллекцией точек с цветом для каждого узла
+        # (вместо отдельного вызова draw_networkx_nodes на каждый тип)
+        node_list = []
+        node_color_list = []
         for node_type, nodes in node_types.items():
             color = self.node_colors.get(node_type, self.node_colors['concept'])
-            nx.draw_networkx_nodes(G, pos, nodelist=nodes,
-                                  node_color=color,
-                                  node_size=3000,
-                                  alpha=0.9,
-                                  ax=ax)
-        
-        # Группировка ребер по типам отношений
-        edge_types = {}
-        for u, v, data in G.edges(data=True):
-            relation = data.get('relation', 'default')
-            if relation not in edge_types:
-                edge_types[relation] = []
-            edge_types[relation].append((u, v))
-        
-        # Отрисовка ребер по типам
+            node_list.extend(nodes)
+            node_color_list.extend([color] * len(nodes))
+        if node_list:
+            xy = np.array([pos[node] for node in node_list])
+            ax.scatter(xy[:, 0], xy[:, 1], c=node_color_list,
+                       s=3000, alpha=0.9, zorder=2)
+        
+        # Ребра, сгруппированные по типам отношений
+        edge_types = self._edges_by_relation
+        
+        # Все ребра - одна коллекция отрезков с цветом и стилем для каждого
+        # ребра; отдельные объекты-стрелки для каждого ребра не создаются.
+        # Направление связи показывают наконечники, нарисованные одним
+        # вызовом quiver в середине каждого ребра
+        segments = []
+        edge_color_list = []
+        edge_style_list = []
         for relation, edges in edge_types.items():
             color = self.edge_colors.get(relation, self.edge_colors['default'])
             style = self.edge_styles.get(relation, self.edge_styles['default'])
-            nx.draw_networkx_edges(G, pos, edgelist=edges,
-                                  edge_color=color,
-                                  style=style,
-                                  width=2,
-                                  alpha=0.6,
-                                  arrows=True,
-                                  arrowsize=20,
-                                  arrowstyle='->',
-                                  connectionstyle='arc3,rad=0.1',
-                                  ax=ax)
+            segments.extend((pos[u], pos[v]) for u, v in edges)
+            edge_color_list.extend([color] * len(edges))
+            edge_style_list.extend([style] * len(edges))
+        if segments:
+            segments = np.array(segments)
+            ax.add_collection(LineCollection(segments,
+                                             colors=edge_color_list,
+                                             linestyles=edge_style_list,
+                                             linewidths=2,
+                                             alpha=0.6,
+                                             zorder=1))
+            # Наконечник: короткая стрелка от 55% к 65% длины ребра (у конца
+            # ребра ее закрыл бы узел)
+            starts = segments[:, 0]
+            deltas = segments[:, 1] - starts
+            ax.quiver(starts[:, 0] + 0.55 * deltas[:, 0], starts[:, 1] + 0.55 * deltas[:, 1],
+                      0.1 * deltas[:, 0], 0.1 * deltas[:, 1],
+                      color=edge_color_list, angles='xy', scale_units='xy', scale=1,
+                      width=0.002, headwidth=6, headlength=7, headaxislength=6,
+                      alpha=0.8, zorder=1)
+            ax.autoscale_view()
         
         # Подписи узлов
         nx.draw_networkx_labels(G, pos,
@@ -157,43 +238,43 @@ class NetworkVisualizer:
                     fontsize=16, fontweight='bold', pad=20)
         ax.axis('off')
         
-        plt.tight_layout()
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        print(f"Полная визуализация сохранена в {output_file}")
-        plt.close()
+        if own_figure:
+            plt.tight_layout()
+            plt.savefig(output_file, dpi=300, bbox_inches='tight')
+            print(f"Полная визуализация сохранена в {output_file}")
+            plt.close()
     
     def visualize_disease_symptoms(self, output_file: str = "semantic_network_diseases.png",
-                                   figsize: tuple = (16, 12)):
+                                   figsize: tuple = (16, 12), ax=None):
         """
         Визуализировать связи заболеваний и симптомов
         
         Args:
             output_file: Имя файла для сохранения
             figsize: Размер фигуры
+            ax: Оси matplotlib для рисования; если заданы, отдельная фигура
+                не создается и файл не сохраняется
         """
-        G = self.create_graph()
+        G = self._get_graph()
         
         # Фильтровать только заболевания, симптомы и их связи
-        diseases = [n for n in G.nodes() if G.nodes[n].get('type') == 'disease']
-        symptoms = [n for n in G.nodes() if G.nodes[n].get('type') == 'symptom']
-        
-        subgraph_nodes = diseases + symptoms
-        subgraph = G.subgraph(subgraph_nodes)
+        diseases = self._nodes_by_type.get('disease', [])
+        symptoms = self._nodes_by_type.get('symptom', [])
         
-        fig, ax = plt.subplots(figsize=figsize)
+        # Представление подграфа без копирования смежности (проверка узла - по множеству)
+        allowed = set(diseases).union(symptoms)
+        subgraph = nx.subgraph_view(G, filter_node=allowed.__contains__)
         
-        # Двудольный layout
-        pos = {}
+        own_figure = ax is None
+        if own_figure:
+            fig, ax = plt.subplots(figsize=figsize)
         
-        # Заболевания слева
-        y_step = 1.0 / (len(diseases) + 1)
-        for i, disease in enumerate(diseases):
-            pos[disease] = (0, 1 - (i + 1) * y_step)
-        
-        # Симптомы справа
-        y_step = 1.0 / (len(symptoms) + 1)
-        for i, symptom in enumerate(symptoms):
-            pos[symptom] = (2, 1 - (i + 1) * y_step)
+        # Двудольный layout: равномерно по вертикали, без крайних точек 1 и 0
+        # (заболевания слева, симптомы справа)
+        ys_diseases = np.linspace(1, 0, len(diseases) + 2)[1:-1].tolist()
+        ys_symptoms = np.linspace(1, 0, len(symptoms) + 2)[1:-1].tolist()
+        pos = dict(zip(diseases, ((0, y) for y in ys_diseases)))
+        pos.update(zip(symptoms, ((2, y) for y in ys_symptoms)))
         
         # Отрисовка узлов
         nx.draw_networkx_nodes(subgraph, pos, nodelist=diseases,
@@ -210,7 +291,7 @@ class NetworkVisualizer:
         
         # Отрисовка ребер
         nx.draw_networkx_edges(subgraph, pos,
-                              edge_color=self.edge_colors['имеет_симптом'],
+                              edge_color=self.edge_colors[REL_HAS_SYMPTOM],
                               style='dashed',
                               width=2,
                               alpha=0.6,
@@ -238,43 +319,51 @@ class NetworkVisualizer:
                     fontsize=16, fontweight='bold', pad=20)
         ax.axis('off')
         
-        plt.tight_layout()
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        print(f"Визуализация заболеваний и симптомов сохранена в {output_file}")
-        plt.close()
+        if own_figure:
+            plt.tight_layout()
+            plt.savefig(output_file, dpi=300, bbox_inches='tight')
+            print(f"Визуализация заболеваний и симптомов сохранена в {output_file}")
+            plt.close()
     
     def visualize_hierarchy(self, output_file: str = "semantic_network_hierarchy.png",
-                           figsize: tuple = (14, 10)):
+                           figsize: tuple = (14, 10), ax=None):
         """
         Визуализировать иерархию категорий и заболеваний
         
         Args:
             output_file: Имя файла для сохранения
             figsize: Размер фигуры
+            ax: Оси matplotlib для рисования; если заданы, отдельная фигура
+                не создается и файл не сохраняется
         """
-        G = self.create_graph()
+        G = self._get_graph()
         
         # Фильтровать только категории, заболевания и связи "является_подтипом"
-        categories = [n for n in G.nodes() if G.nodes[n].get('type') == 'category']
-        diseases = [n for n in G.nodes() if G.nodes[n].get('type') == 'disease']
-        
-        # Создать подграф с иерархическими связями
-        H = nx.DiGraph()
-        for node in categories + diseases:
-            H.add_node(node, **G.nodes[node])
-        
-        for u, v, data in G.edges(data=True):
-            if data.get('relation') == 'является_подтипом' and u in H and v in H:
-                H.add_edge(u, v, **data)
-        
-        fig, ax = plt.subplots(figsize=figsize)
-        
-        # Иерархический layout
+        categories = self._nodes_by_type.get('category', [])
+        diseases = self._nodes_by_type.get('disease', [])
+        
+        # Представление подграфа с иерархическими связями (без копирования графа)
+        allowed = set(categories).union(diseases)
+        subtype_edges = set(self._edges_by_relation.get(REL_SUBTYPE, []))
+        H = nx.subgraph_view(G, filter_node=allowed.__contains__,
+                             filter_edge=lambda u, v: (u, v) in subtype_edges)
+        
+        own_figure = ax is None
+        if own_figure:
+            fig, ax = plt.subplots(figsize=figsize)
+        
+        # Иерархический layout. Раскладка graphviz и запасная spring-раскладка
+        # кэшируются под разными ключами: если graphviz не установлен, в кэш
+        # под ключом "dot" ничего не попадает
         try:
-            pos = nx.nx_agraph.graphviz_layout(H, prog='dot')
-        except:
+            pos = self._cached_layout(
+                H, "hierarchy:dot",
+                lambda: nx.nx_agraph.graphviz_layout(H, prog='dot'))
+        except Exception:
             # Если graphviz не установлен, использовать spring layout
-            pos = nx.spring_layout(H, k=3, iterations=50)
+            pos = self._cached_layout(
+                H, "hierarchy:spring:k=3:iterations=50:seed=42",
+                lambda: nx.spring_layout(H, k=3, iterations=50, seed=42))
         
         # Отрисовка узлов
         nx.draw_networkx_nodes(H, pos, nodelist=categories,
@@ -291,7 +380,7 @@ class NetworkVisualizer:
         
         # Отрисовка ребер
         nx.draw_networkx_edges(H, pos,
-                              edge_color=self.edge_colors['является_подтипом'],
+                              edge_color=self.edge_colors[REL_SUBTYPE],
                               width=2.5,
                               alpha=0.7,
                               arrows=True,
@@ -317,10 +406,11 @@ class NetworkVisualizer:
                     fontsize=16, fontweight='bold', pad=20)
         ax.axis('off')
         
-        plt.tight_layout()
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        print(f"Визуализация иерархии сохранена в {output_file}")
-        plt.close()
+        if own_figure:
+            plt.tight_layout()
+            plt.savefig(output_file, dpi=300, bbox_inches='tight')
+            print(f"Визуализация иерархии сохранена в {output_file}")
+            plt.close()
     
     def visualize_all(self):
         """Создать все визуализации"""
@@ -333,6 +423,30 @@ class NetworkVisualizer:
         
         print()
         print("Все визуализации созданы успешно!")
+    
+    def visualize_all_combined(self, output_file: str = "semantic_network_combined.png",
+                               figsize: tuple = (20, 36), dpi: int = 150):
+        """
+        Создать все визуализации на одной фигуре и сохранить одним файлом
+        
+        Инициализация фигуры и кодирование PNG выполняются один раз
+        вместо трех.
+        
+        Args:
+            output_file: Имя файла для сохранения
+            figsize: Размер общей фигуры
+            dpi: Разрешение сохраняемого изображения
+        """
+        fig, axes = plt.subplots(3, 1, figsize=figsize)
+        
+        self.visualize_full_network(ax=axes[0])
+        self.visualize_disease_symptoms(ax=axes[1])
+        self.visualize_hierarchy(ax=axes[2])
+        
+        plt.tight_layout()
+        plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+        print(f"Общая визуализация сохранена в {output_file}")
+        plt.close(fig)
 
 
 def main():
@@ -3,8 +3,43 @@
 Создает текстовое представление базы знаний для отчета
 """
 
-from semantic_network import SemanticNetwork, create_medical_knowledge_base
-from typing import Dict, List, Set
+import io
+from collections import Counter
+from operator import itemgetter
+from semantic_network import (SemanticNetwork, create_medical_knowledge_base,
+                              REL_SUBTYPE, REL_HAS_SYMPTOM, REL_TREATED_BY)
+from typing import Dict, Iterable, List, Optional, Set, TextIO, Tuple
+
+
+# Максимальная длина полосы гистограммы в статистике (число видно рядом с полосой)
+MAX_BAR_LENGTH = 60
+
+# Разделители разделов отчета (вычисляются один раз при импорте)
+_SEPARATOR = "=" * 70
+_RULE = "-" * 70
+
+# Префиксы строк-ветвей в списках симптомов и методов лечения
+_TREE_BRANCH = "│  ├── "
+_TREE_LEAF = "│  └── "
+
+# Заголовок полного отчета в рамке вместе с отступом после него
+# (собирается один раз при импорте)
+_REPORT_BANNER = "".join((
+    "╔" + "═" * 68 + "╗",
+    "║" + " " * 68 + "║",
+    "║" + "  ОТЧЕТ ПО СЕМАНТИЧЕСКОЙ СЕТИ".center(68) + "║",
+    "║" + "  Экспертная система медицинской диагностики".center(68) + "║",
+    "║" + "  Лабораторная работа №3".center(68) + "║",
+    "║" + " " * 68 + "║",
+    "╚" + "═" * 68 + "╝",
+    "\n\n",
+))
+
+# Разделы полного отчета в порядке вывода
+REPORT_SECTIONS = ("statistics", "hierarchy", "symptoms", "treatments", "nodes", "graph")
+
+# Размер буфера файла при потоковой записи отчета
+REPORT_BUFFER_SIZE = 1 << 20
 
 
 class TextVisualizer:
@@ -20,25 +55,125 @@ class TextVisualizer:
             knowledge_base: База знаний для визуализации
         """
         self.kb = knowledge_base
+        # Кэш группировок связей (см. _index_relations)
+        self._relation_index = None
+        self._relation_index_version = None
+        # Кэш узлов по типам: {тип: [(узел, атрибуты)]} (см. _index_nodes)
+        self._node_index: Dict[str, List[Tuple[str, Dict]]] = {}
+        self._node_index_version = None
+        # Последний собранный отчет: (версия базы знаний, текст)
+        self._report_cache: Optional[Tuple[int, str]] = None
     
-    def visualize_hierarchy(self) -> str:
+    @staticmethod
+    def _emit(buf: TextIO, line: str):
+        """Записать строку в буфер отчета"""
+        buf.write(line)
+        buf.write("\n")
+    
+    @staticmethod
+    def _emit_branches(buf: TextIO, items: List[str]):
+        """Записать непустой список как ветви дерева (последний - с └──)"""
+        write = buf.write
+        for item in items[:-1]:
+            write(_TREE_BRANCH)
+            write(item)
+            write("\n")
+        write(_TREE_LEAF)
+        write(items[-1])
+        write("\n")
+    
+    @staticmethod
+    def _bar(length: int) -> str:
+        """Полоса гистограммы (длинные полосы обрезаются до MAX_BAR_LENGTH)"""
+        if length > MAX_BAR_LENGTH:
+            return "█" * MAX_BAR_LENGTH + "…"
+        return "█" * length
+    
+    def _index_relations(self) -> Tuple[Dict[str, List[str]], Dict[str, List[str]],
+                                        Dict[str, List[Tuple[str, str]]]]:
+        """
+        Сгруппировать связи для отчета за один проход
+        (строится один раз на версию базы знаний)
+        
+        Returns:
+            Кортеж (symptoms_by_disease, treatments_by_disease, relations_by_type):
+            симптомы и методы лечения каждого заболевания и пары
+            (источник, цель) для каждого типа отношения; все списки отсортированы
+        """
+        if self._relation_index_version != self.kb.version:
+            symptoms_by_disease: Dict[str, List[str]] = {}
+            treatments_by_disease: Dict[str, List[str]] = {}
+            relations_by_type: Dict[str, List[Tuple[str, str]]] = {}
+            for source, relation, target in self.kb.relations:
+                relations_by_type.setdefault(relation, []).append((source, target))
+                if relation == REL_HAS_SYMPTOM:
+                    symptoms_by_disease.setdefault(source, []).append(target)
+                elif relation == REL_TREATED_BY:
+                    treatments_by_disease.setdefault(source, []).append(target)
+            # Все группы сортируются один раз здесь, разделы отчета
+            # выводят их без повторной сортировки
+            for groups in (symptoms_by_disease, treatments_by_disease, relations_by_type):
+                for items in groups.values():
+                    items.sort()
+            
+            self._relation_index = (symptoms_by_disease, treatments_by_disease,
+                                    relations_by_type)
+            self._relation_index_version = self.kb.version
+        return self._relation_index
+    
+    def _index_nodes(self) -> Dict[str, List[Tuple[str, Dict]]]:
+        """
+        Сгруппировать узлы по типам вместе с атрибутами за один проход
+        (строится один раз на версию базы знаний)
+        
+        Returns:
+            Словарь {тип: [(узел, атрибуты)]}, пары отсортированы по имени узла
+        """
+        if self._node_index_version != self.kb.version:
+            node_index: Dict[str, List[Tuple[str, Dict]]] = {}
+            for node_name, node_attrs in self.kb.nodes.items():
+                node_index.setdefault(node_attrs.get('type'), []).append((node_name, node_attrs))
+            for entries in node_index.values():
+                entries.sort(key=itemgetter(0))
+            
+            self._node_index = node_index
+            self._node_index_version = self.kb.version
+        return self._node_index
+    
+    def visualize_hierarchy(self, buf: Optional[TextIO] = None) -> Optional[str]:
         """
         Визуализировать иерархию в виде дерева
         
+        Args:
+            buf: Поток (буфер или файл), в который пишется текст; если не задан,
+                создается собственный буфер
+        
         Returns:
-            Текстовое представление иерархии
+            Текстовое представление иерархии (если buf не задан)
         """
-        lines = []
-        lines.append("=" * 70)
-        lines.append("ИЕРАРХИЯ КАТЕГОРИЙ И ЗАБОЛЕВАНИЙ")
-        lines.append("=" * 70)
-        lines.append("")
+        out = io.StringIO() if buf is None else buf
+        self._emit(out, _SEPARATOR)
+        self._emit(out, "ИЕРАРХИЯ КАТЕГОРИЙ И ЗАБОЛЕВАНИЙ")
+        self._emit(out, _SEPARATOR)
+        self._emit(out, "")
         
         # Найти корневой узел
         root = "Заболевание"
         
-        def print_tree(node: str, prefix: str = "", is_last: bool = True):
-            """Рекурсивная печать дерева"""
+        # Дочерние узлы каждого родителя собираются за один проход
+        # по связям "является_подтипом" и сортируются один раз
+        children_by_parent: Dict[str, List[str]] = {}
+        for child, _, parent in self.kb.get_relations_by_type(REL_SUBTYPE):
+            children_by_parent.setdefault(parent, []).append(child)
+        for children in children_by_parent.values():
+            children.sort()
+        
+        # Обход дерева в глубину с явным стеком вместо рекурсии.
+        # Элемент стека: (узел, отступ, последний ли узел среди братьев)
+        stack = [(root, "", True)]
+        while stack:
+            node, prefix, is_last = stack.pop()
+            
             # Символы для рисования дерева
             connector = "└── " if is_last else "├── "
             
@@ -55,165 +190,151 @@ class TextVisualizer:
             else:
                 node_str = f"{node}"
             
-            lines.append(prefix + connector + node_str)
+            self._emit(out, prefix + connector + node_str)
             
-            # Найти дочерние узлы
-            children = []
-            for rel in self.kb.get_relations_to(node):
-                if rel[1] == "является_подтипом":
-                    children.append(rel[0])
+            children = children_by_parent.get(node, ())
             
-            # Рекурсивно обработать детей
-            for i, child in enumerate(sorted(children)):
-                is_last_child = (i == len(children) - 1)
-                extension = "    " if is_last else "│   "
-                print_tree(child, prefix + extension, is_last_child)
-        
-        print_tree(root)
-        lines.append("")
-        
-        return "\n".join(lines)
+            # Дети кладутся в стек в обратном порядке, чтобы
+            # извлекаться в алфавитном
+            if children:
+                child_prefix = prefix + ("    " if is_last else "│   ")
+                stack.append((children[-1], child_prefix, True))
+                for child in reversed(children[:-1]):
+                    stack.append((child, child_prefix, False))
+        
+        if buf is None:
+            return out.getvalue()
     
-    def visualize_disease_symptoms(self) -> str:
+    def visualize_disease_symptoms(self, buf: Optional[TextIO] = None) -> Optional[str]:
         """
         Визуализировать связи заболеваний и симптомов
         
+        Args:
+            buf: Поток (буфер или файл), в который пишется текст; если не задан,
+                создается собственный буфер
+        
         Returns:
-            Текстовое представление связей
+            Текстовое представление связей (если buf не задан)
         """
-        lines = []
-        lines.append("=" * 70)
-        lines.append("СВЯЗИ: ЗАБОЛЕВАНИЯ → СИМПТОМЫ")
-        lines.append("=" * 70)
-        lines.append("")
+        out = io.StringIO() if buf is None else buf
+        self._emit(out, _SEPARATOR)
+        self._emit(out, "СВЯЗИ: ЗАБОЛЕВАНИЯ → СИМПТОМЫ")
+        self._emit(out, _SEPARATOR)
+        self._emit(out, "")
         
-        diseases = sorted(self.kb.get_all_nodes_by_type("disease"))
+        diseases = self.kb.get_sorted_nodes_by_type("disease")
+        symptoms_by_disease = self._index_relations()[0]
         
         for disease in diseases:
-            lines.append(f"┌─ {disease}")
+            self._emit(out, f"┌─ {disease}")
             
             # Получить симптомы
-            symptoms = []
-            for rel in self.kb.get_relations_from(disease):
-                if rel[1] == "имеет_симптом":
-                    symptoms.append(rel[2])
-            
-            symptoms = sorted(symptoms)
-            for i, symptom in enumerate(symptoms):
-                is_last = (i == len(symptoms) - 1)
-                connector = "└──" if is_last else "├──"
-                lines.append(f"│  {connector} {symptom}")
+            symptoms = symptoms_by_disease.get(disease, ())
+            if symptoms:
+                self._emit_branches(out, symptoms)
             
-            lines.append("│")
+            self._emit(out, "│")
         
-        lines.append("")
-        return "\n".join(lines)
+        if buf is None:
+            return out.getvalue()
     
-    def visualize_disease_treatment(self) -> str:
+    def visualize_disease_treatment(self, buf: Optional[TextIO] = None) -> Optional[str]:
         """
         Визуализировать связи заболеваний и методов лечения
         
+        Args:
+            buf: Поток (буфер или файл), в который пишется текст; если не задан,
+                создается собственный буфер
+        
         Returns:
-            Текстовое представление связей
+            Текстовое представление связей (если buf не задан)
         """
-        lines = []
-        lines.append("=" * 70)
-        lines.append("СВЯЗИ: ЗАБОЛЕВАНИЯ → МЕТОДЫ ЛЕЧЕНИЯ")
-        lines.append("=" * 70)
-        lines.append("")
+        out = io.StringIO() if buf is None else buf
+        self._emit(out, _SEPARATOR)
+        self._emit(out, "СВЯЗИ: ЗАБОЛЕВАНИЯ → МЕТОДЫ ЛЕЧЕНИЯ")
+        self._emit(out, _SEPARATOR)
+        self._emit(out, "")
         
-        diseases = sorted(self.kb.get_all_nodes_by_type("disease"))
+        diseases = self.kb.get_sorted_nodes_by_type("disease")
+        treatments_by_disease = self._index_relations()[1]
         
         for disease in diseases:
-            lines.append(f"┌─ {disease}")
+            self._emit(out, f"┌─ {disease}")
             
             # Получить методы лечения
-            treatments = []
-            for rel in self.kb.get_relations_from(disease):
-                if rel[1] == "лечится":
-                    treatments.append(rel[2])
+            treatments = treatments_by_disease.get(disease)
             
             if treatments:
-                treatments = sorted(treatments)
-                for i, treatment in enumerate(treatments):
-                    is_last = (i == len(treatments) - 1)
-                    connector = "└──" if is_last else "├──"
-                    lines.append(f"│  {connector} {treatment}")
+                self._emit_branches(out, treatments)
             else:
-                lines.append(f"│  └── (нет данных)")
+                self._emit(out, _TREE_LEAF + "(нет данных)")
             
-            lines.append("│")
+            self._emit(out, "│")
         
-        lines.append("")
-        return "\n".join(lines)
+        if buf is None:
+            return out.getvalue()
     
-    def visualize_statistics(self) -> str:
+    def visualize_statistics(self, buf: Optional[TextIO] = None) -> Optional[str]:
         """
         Визуализировать статистику по базе знаний
         
+        Args:
+            buf: Поток (буфер или файл), в который пишется текст; если не задан,
+                создается собственный буфер
+        
         Returns:
-            Текстовое представление статистики
+            Текстовое представление статистики (если buf не задан)
         """
-        lines = []
-        lines.append("=" * 70)
-        lines.append("СТАТИСТИКА БАЗЫ ЗНАНИЙ")
-        lines.append("=" * 70)
-        lines.append("")
-        
-        # Статистика по узлам
-        node_types = {}
-        for node_name, node_attrs in self.kb.nodes.items():
-            node_type = node_attrs.get("type", "unknown")
-            node_types[node_type] = node_types.get(node_type, 0) + 1
-        
-        lines.append(f"Всего узлов: {len(self.kb.nodes)}")
-        lines.append("")
-        lines.append("Распределение по типам узлов:")
-        for node_type in sorted(node_types.keys()):
-            count = node_types[node_type]
-            bar = "█" * (count * 2)
-            lines.append(f"  {node_type:20s} │ {bar} {count}")
-        
-        lines.append("")
-        
-        # Статистика по связям
-        relation_types = {}
-        for rel in self.kb.relations:
-            rel_type = rel[1]
-            relation_types[rel_type] = relation_types.get(rel_type, 0) + 1
-        
-        lines.append(f"Всего связей: {len(self.kb.relations)}")
-        lines.append("")
-        lines.append("Распределение по типам связей:")
-        for rel_type in sorted(relation_types.keys()):
-            count = relation_types[rel_type]
-            bar = "█" * (count // 2)
-            lines.append(f"  {rel_type:25s} │ {bar} {count}")
-        
-        lines.append("")
-        
-        return "\n".join(lines)
+        out = io.StringIO() if buf is None else buf
+        self._emit(out, _SEPARATOR)
+        self._emit(out, "СТАТИСТИКА БАЗЫ ЗНАНИЙ")
+        self._emit(out, _SEPARATOR)
+        self._emit(out, "")
+        
+        # Статистика по узлам - из той же группировки узлов по типам,
+        # что выводит visualize_nodes_list (строится один раз на отчет)
+        node_types = Counter()
+        for node_type, entries in self._index_nodes().items():
+            node_types[node_type if node_type is not None else "unknown"] += len(entries)
+        
+        self._emit(out, f"Всего узлов: {len(self.kb.nodes)}")
+        self._emit(out, "")
+        self._emit(out, "Распределение по типам узлов:")
+        row = "  {:20s} │ {} {}\n".format
+        for node_type, count in sorted(node_types.items()):
+            out.write(row(node_type, self._bar(count * 2), count))
+        
+        self._emit(out, "")
+        
+        # Статистика по связям (счетчики поддерживаются базой знаний)
+        relation_types = self.kb.get_relation_type_counts()
+        
+        self._emit(out, f"Всего связей: {self.kb.relation_count()}")
+        self._emit(out, "")
+        self._emit(out, "Распределение по типам связей:")
+        row = "  {:25s} │ {} {}\n".format
+        for rel_type, count in sorted(relation_types.items()):
+            out.write(row(rel_type, self._bar(count // 2), count))
+        
+        if buf is None:
+            return out.getvalue()
     
-    def visualize_nodes_list(self) -> str:
+    def visualize_nodes_list(self, buf: Optional[TextIO] = None) -> Optional[str]:
         """
         Визуализировать список всех узлов с описаниями
         
+        Args:
+            buf: Поток (буфер или файл), в который пишется текст; если не задан,
+                создается собственный буфер
+        
         Returns:
-            Текстовое представление узлов
+            Текстовое представление узлов (если buf не задан)
         """
-        lines = []
-        lines.append("=" * 70)
-        lines.append("СПИСОК УЗЛОВ СЕМАНТИЧЕСКОЙ СЕТИ")
-        lines.append("=" * 70)
-        lines.append("")
-        
-        # Группировка по типам
-        node_types = {}
-        for node_name, node_attrs in self.kb.nodes.items():
-            node_type = node_attrs.get("type", "unknown")
-            if node_type not in node_types:
-                node_types[node_type] = []
-            node_types[node_type].append((node_name, node_attrs))
+        out = io.StringIO() if buf is None else buf
+        self._emit(out, _SEPARATOR)
+        self._emit(out, "СПИСОК УЗЛОВ СЕМАНТИЧЕСКОЙ СЕТИ")
+        self._emit(out, _SEPARATOR)
+        self._emit(out, "")
         
         # Вывод по типам
         type_names = {
@@ -223,107 +344,150 @@ class TextVisualizer:
             'treatment': 'МЕТОДЫ ЛЕЧЕНИЯ'
         }
         
+        node_index = self._index_nodes()
         for node_type in ['category', 'disease', 'symptom', 'treatment']:
-            if node_type in node_types:
-                lines.append(f"\n{type_names[node_type]}:")
-                lines.append("-" * 70)
+            # Узлы типа с атрибутами, уже отсортированные по имени
+            entries = node_index.get(node_type)
+            if entries:
+                self._emit(out, f"\n{type_names[node_type]}:")
+                self._emit(out, _RULE)
                 
-                for node_name, node_attrs in sorted(node_types[node_type]):
-                    lines.append(f"\n• {node_name}")
+                for node_name, node_attrs in entries:
+                    self._emit(out, f"\n• {node_name}")
                     
                     # Описание
                     if 'description' in node_attrs:
-                        lines.append(f"  Описание: {node_attrs['description']}")
+                        self._emit(out, f"  Описание: {node_attrs['description']}")
                     
                     # Дополнительные атрибуты
                     for key, value in node_attrs.items():
-                        if key not in ['type', 'description']:
-                            lines.append(f"  {key}: {value}")
+                        if key != 'type' and key != 'description':
+                            self._emit(out, f"  {key}: {value}")
         
-        lines.append("")
-        return "\n".join(lines)
+        if buf is None:
+            return out.getvalue()
     
-    def visualize_graph_structure(self) -> str:
+    def visualize_graph_structure(self, buf: Optional[TextIO] = None) -> Optional[str]:
         """
         Визуализировать структуру графа в псевдографическом виде
         
+        Args:
+            buf: Поток (буфер или файл), в который пишется текст; если не задан,
+                создается собственный буфер
+        
         Returns:
-            Текстовое представление графа
+            Текстовое представление графа (если buf не задан)
         """
-        lines = []
-        lines.append("=" * 70)
-        lines.append("СТРУКТУРА СЕМАНТИЧЕСКОЙ СЕТИ (ГРАФ)")
-        lines.append("=" * 70)
-        lines.append("")
-        lines.append("Легенда:")
-        lines.append("  ───> является_подтипом")
-        lines.append("  ···> имеет_симптом")
-        lines.append("  ═══> лечится")
-        lines.append("")
-        
-        # Группировка связей по типам
-        relation_groups = {}
-        for source, relation, target in self.kb.relations:
-            if relation not in relation_groups:
-                relation_groups[relation] = []
-            relation_groups[relation].append((source, target))
+        out = io.StringIO() if buf is None else buf
+        self._emit(out, _SEPARATOR)
+        self._emit(out, "СТРУКТУРА СЕМАНТИЧЕСКОЙ СЕТИ (ГРАФ)")
+        self._emit(out, _SEPARATOR)
+        self._emit(out, "")
+        self._emit(out, "Легенда:")
+        self._emit(out, "  ───> является_подтипом")
+        self._emit(out, "  ···> имеет_симптом")
+        self._emit(out, "  ═══> лечится")
+        self._emit(out, "")
+        
+        # Связи, сгруппированные по типам
+        relation_groups = self._index_relations()[2]
         
         # Вывод по типам отношений
         relation_symbols = {
-            'является_подтипом': '───>',
-            'имеет_симптом': '···>',
-            'лечится': '═══>'
+            REL_SUBTYPE: '───>',
+            REL_HAS_SYMPTOM: '···>',
+            REL_TREATED_BY: '═══>'
         }
         
-        for relation_type in ['является_подтипом', 'имеет_симптом', 'лечится']:
+        for relation_type, symbol in relation_symbols.items():
             if relation_type in relation_groups:
-                lines.append(f"\n{relation_type.upper()}:")
-                lines.append("-" * 70)
+                self._emit(out, f"\n{relation_type.upper()}:")
+                self._emit(out, _RULE)
                 
-                for source, target in sorted(relation_groups[relation_type]):
-                    symbol = relation_symbols.get(relation_type, '--->')
-                    lines.append(f"  {source:30s} {symbol} {target}")
+                # Символ связи постоянен для всей группы - он подставляется
+                # в шаблон строки один раз
+                row = ("  {:30s} " + symbol + " {}\n").format
+                for source, target in relation_groups[relation_type]:
+                    out.write(row(source, target))
+        
+        if buf is None:
+            return out.getvalue()
+    
+    def _write_report(self, out: TextIO, echo: Iterable[str] = ()):
+        """
+        Записать все разделы отчета в поток
+        
+        Args:
+            out: Поток для записи отчета
+            echo: Имена разделов (из REPORT_SECTIONS), которые также
+                выводятся на экран
+        """
+        sections = {
+            "statistics": self.visualize_statistics,
+            "hierarchy": self.visualize_hierarchy,
+            "symptoms": self.visualize_disease_symptoms,
+            "treatments": self.visualize_disease_treatment,
+            "nodes": self.visualize_nodes_list,
+            "graph": self.visualize_graph_structure,
+        }
         
-        lines.append("")
-        return "\n".join(lines)
+        out.write(_REPORT_BANNER)
+        for i, name in enumerate(REPORT_SECTIONS):
+            if i:
+                out.write("\n\n")
+            if name in echo:
+                # Раздел строится один раз и для экрана, и для отчета
+                text = sections[name]()
+                print(text)
+                out.write(text)
+            else:
+                sections[name](out)
     
-    def create_full_report(self, output_file: str = "semantic_network_report.txt"):
+    def create_full_report(self, output_file: str = "semantic_network_report.txt",
+                           return_text: bool = True,
+                           sections_to_echo: Iterable[str] = ()) -> Optional[str]:
         """
         Создать полный отчет по семантической сети
         
+        Собранный текст отчета кэшируется до изменения базы знаний.
+        
         Args:
             output_file: Имя файла для сохранения
+            return_text: Вернуть текст отчета; если False, разделы пишутся
+                прямо в файл и отчет целиком в памяти не собирается
+            sections_to_echo: Имена разделов (из REPORT_SECTIONS), которые
+                также выводятся на экран при построении отчета
+        
+        Returns:
+            Текст отчета (если return_text)
         """
-        report = []
-        
-        report.append("╔" + "═" * 68 + "╗")
-        report.append("║" + " " * 68 + "║")
-        report.append("║" + "  ОТЧЕТ ПО СЕМАНТИЧЕСКОЙ СЕТИ".center(68) + "║")
-        report.append("║" + "  Экспертная система медицинской диагностики".center(68) + "║")
-        report.append("║" + "  Лабораторная работа №3".center(68) + "║")
-        report.append("║" + " " * 68 + "║")
-        report.append("╚" + "═" * 68 + "╝")
-        report.append("\n\n")
-        
-        report.append(self.visualize_statistics())
-        report.append("\n\n")
-        report.append(self.visualize_hierarchy())
-        report.append("\n\n")
-        report.append(self.visualize_disease_symptoms())
-        report.append("\n\n")
-        report.append(self.visualize_disease_treatment())
-        report.append("\n\n")
-        report.append(self.visualize_nodes_list())
-        report.append("\n\n")
-        report.append(self.visualize_graph_structure())
-        
-        # Сохранить в файл
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("".join(report))
+        echo = frozenset(sections_to_echo)
+        unknown = echo.difference(REPORT_SECTIONS)
+        if unknown:
+            raise ValueError(f"Неизвестные разделы отчета: {', '.join(sorted(unknown))}")
+        
+        text = None
+        if (not echo and self._report_cache is not None
+                and self._report_cache[0] == self.kb.version):
+            # База знаний не менялась - отчет берется из кэша
+            text = self._report_cache[1]
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+        elif return_text:
+            # Отчет собирается в одном буфере и записывается в файл целиком
+            report = io.StringIO()
+            self._write_report(report, echo)
+            text = report.getvalue()
+            self._report_cache = (self.kb.version, text)
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+        else:
+            with open(output_file, 'w', encoding='utf-8', buffering=REPORT_BUFFER_SIZE) as f:
+                self._write_report(f, echo)
         
         print(f"Отчет сохранен в {output_file}")
         
-        return "".join(report)
+        return text if return_text else None
 
 
 def main():
@@ -339,14 +503,10 @@ def main():
     # Создать визуализатор
     visualizer = TextVisualizer(kb)
     
-    # Вывести на экран
-    print(visualizer.visualize_statistics())
-    print(visualizer.visualize_hierarchy())
-    print(visualizer.visualize_disease_symptoms())
-    
-    # Создать полный отчет
-    print("\nСоздание полного отчета...")
-    visualizer.create_full_report()
+    # Создать полный отчет; первые разделы при этом выводятся на экран
+    print("Создание полного отчета...\n")
+    visualizer.create_full_report(return_text=False,
+                                  sections_to_echo=["statistics", "hierarchy", "symptoms"])
     print("\nГотово!")
 
 